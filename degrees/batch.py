@@ -0,0 +1,238 @@
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+
+from cache import PathCache
+from snapshot import load_snapshot
+
+PORT = 8050
+
+
+def resolve(graph, query, field):
+    """
+    Returns the graph index of the person named by `query[field]`,
+    or by `query[field + "_id"]` if an IMDB id is given instead.
+
+    Raises ValueError if no single person matches, or the name is
+    not a string.
+    """
+    if f"{field}_id" in query:
+        person = graph.person(str(query[f"{field}_id"]))
+        if person is None:
+            raise ValueError(f"no person with id {query[field + '_id']}")
+        return person
+
+    name = query.get(field)
+    if name is None:
+        raise ValueError(f"missing {field}")
+    if not isinstance(name, str):
+        raise ValueError(f"{field} must be a name, not {name!r}")
+    people = graph.people_named(name)
+    if len(people) == 0:
+        raise ValueError(f"person not found: {name}")
+    elif len(people) > 1:
+        ids = ", ".join(graph.person_ids[person] for person in people)
+        raise ValueError(f"ambiguous name {name}, pass {field}_id: {ids}")
+    return people[0]
+
+
+def answer(graph, query, cache=None):
+    """
+    Answer one source/target query, returning a JSON-ready dict
+    that includes the query's latency in milliseconds. Queries that
+    are not JSON objects get an "error" result.
+
+    Paths are looked up in `cache` first if a PathCache is given.
+    """
+    start = time.perf_counter()
+    try:
+        if not isinstance(query, dict):
+            raise ValueError("query must be a JSON object")
+        source = resolve(graph, query, "source")
+        target = resolve(graph, query, "target")
+    except ValueError as e:
+        result = {"error": str(e)}
+    else:
+        path = (cache or graph).shortest_path(source, target)
+        result = {
+            "source": graph.person_ids[source],
+            "target": graph.person_ids[target],
+            "degrees": None if path is None else len(path),
+            "path": None if path is None else [
+                {
+                    "movie_id": graph.movie_ids[movie],
+                    "title": graph.movie_titles[movie],
+                    "person_id": graph.person_ids[person],
+                    "name": graph.person_names[person]
+                }
+                for movie, person in path
+            ]
+        }
+    result["ms"] = round(1000 * (time.perf_counter() - start), 3)
+    return result
+
+
+def run_batch(graph, lines, out, cache=None):
+    """
+    Answer every JSON-lines query in `lines`, writing one JSON result
+    per line to `out` as soon as it is ready.
+
+    Returns (queries answered, total seconds).
+    """
+    count = 0
+    start = time.perf_counter()
+    for line in lines:
+        if not line.strip():
+            continue
+        parsed = time.perf_counter()
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError as e:
+            result = {
+                "error": f"invalid JSON: {e}",
+                "ms": round(1000 * (time.perf_counter() - parsed), 3)
+            }
+        else:
+            result = answer(graph, query, cache)
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        count += 1
+    return count, time.perf_counter() - start
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /path?source=...&target=... answers a single query,
+    POST /batch answers a JSON-lines body, GET /stats reports throughput.
+    The graph stays loaded between requests.
+
+    Throughput is counted over the wall-clock time since the first
+    query, as concurrent requests overlap; "seconds" is the time spent
+    answering queries, summed over requests.
+    """
+
+    graph = None
+    cache = None
+    queries = 0
+    seconds = 0.0
+    started = None
+    lock = Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/path":
+            query = {
+                key: values[0]
+                for key, values in parse_qs(url.query).items()
+            }
+            result = answer(self.graph, query, self.cache)
+            self.record(1, result["ms"] / 1000)
+            self.send_json(200, result)
+        elif url.path == "/stats":
+            cls = type(self)
+            with cls.lock:
+                queries, seconds, started = (
+                    cls.queries, cls.seconds, cls.started)
+            elapsed = time.perf_counter() - started if started else 0
+            self.send_json(200, {
+                "queries": queries,
+                "seconds": round(seconds, 3),
+                "elapsed": round(elapsed, 3),
+                "queries_per_second": round(
+                    queries / elapsed, 1) if elapsed else None,
+                "cache": cls.cache.stats()
+            })
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/batch":
+            self.send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        lines = self.rfile.read(length).decode("utf-8").splitlines()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        out = _TextWriter(self.wfile)
+        count, seconds = run_batch(self.graph, lines, out, self.cache)
+        self.record(count, seconds)
+
+    def record(self, queries, seconds):
+        cls = type(self)
+        with cls.lock:
+            if cls.started is None:
+                cls.started = time.perf_counter() - seconds
+            cls.queries += queries
+            cls.seconds += seconds
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _TextWriter():
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        self.stream.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.stream.flush()
+
+
+def serve(graph, port=PORT, host="127.0.0.1"):
+    """
+    Serve queries over HTTP on `host`:`port` until interrupted.
+    """
+    handler = type("Handler", (QueryHandler,), {
+        "graph": graph,
+        "cache": PathCache(graph)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python batch.py directory [queries.jsonl]\n"
+                 "       python batch.py directory --serve [port]")
+    directory = sys.argv[1]
+
+    print("Loading data...", file=sys.stderr)
+    graph = load_snapshot(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if len(sys.argv) > 2 and sys.argv[2] == "--serve":
+        serve(graph, int(sys.argv[3]) if len(sys.argv) == 4 else PORT)
+        return
+
+    cache = PathCache(graph)
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], encoding="utf-8") as f:
+            count, seconds = run_batch(graph, f, sys.stdout, cache)
+    else:
+        count, seconds = run_batch(graph, sys.stdin, sys.stdout, cache)
+
+    rate = count / seconds if seconds else 0
+    print(f"{count} queries in {seconds:.3f}s ({rate:.1f} queries/s)",
+          file=sys.stderr)
+    print(f"Cache: {cache.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
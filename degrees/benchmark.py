@@ -0,0 +1,138 @@
+import random
+import sys
+import time
+
+import degrees
+import parallel
+from graph import load_graph
+from util import Node, StackFrontier, QueueFrontier
+
+
+def benchmark_search(pairs, graph=None):
+    """
+    Time bidirectional `shortest_path` against single-ended
+    `shortest_path_bfs` on the same (source, target) pairs, and against
+    the search on a StarGraph if one is given.
+
+    Raises AssertionError if the two searches disagree on a path length.
+    """
+    timings = {"bfs": 0.0, "bidirectional": 0.0}
+    for source, target in pairs:
+        start = time.perf_counter()
+        expected = degrees.shortest_path_bfs(source, target)
+        timings["bfs"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target)
+        timings["bidirectional"] += time.perf_counter() - start
+
+        paths = [path]
+        if graph is not None:
+            start = time.perf_counter()
+            path = graph.shortest_path(graph.person(source),
+                                       graph.person(target))
+            timings["graph"] = (timings.get("graph", 0.0)
+                                + time.perf_counter() - start)
+            paths.append(path)
+
+        for path in paths:
+            if expected is None or path is None:
+                assert expected is None and path is None, (source, target)
+            else:
+                assert len(path) == len(expected), (source, target)
+    return timings
+
+
+def benchmark_frontier(frontier_class, n):
+    """
+    Time `n` adds, `n` membership checks and `n` removals on a frontier.
+    """
+    frontier = frontier_class()
+    timings = {}
+
+    start = time.perf_counter()
+    for i in range(n):
+        frontier.add(Node(state=i, parent=None, action=None))
+    timings["add"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(n):
+        frontier.contains_state(i)
+    timings["contains_state"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    while not frontier.empty():
+        frontier.remove()
+    timings["remove"] = time.perf_counter() - start
+    return timings
+
+
+def benchmark_workers(directory, pairs, workers=(1, 2, 4, 8)):
+    """
+    Time `parallel.separation_histogram` over `pairs` for each
+    number of worker processes.
+    """
+    timings = {}
+    for n in workers:
+        start = time.perf_counter()
+        parallel.separation_histogram(directory, pairs, n)
+        timings[n] = time.perf_counter() - start
+    return timings
+
+
+def sample_pairs(n, seed=None):
+    """
+    Return `n` random (source, target) pairs of person ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(n)
+    ]
+
+
+def main():
+    workers_mode = len(sys.argv) > 1 and sys.argv[1] == "workers"
+    if len(sys.argv) > (4 if workers_mode else 3):
+        sys.exit("Usage: python benchmark.py [directory] [pairs]\n"
+                 "       python benchmark.py frontier [nodes]\n"
+                 "       python benchmark.py workers [directory] [pairs]")
+    if len(sys.argv) > 1 and sys.argv[1] == "frontier":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+        for frontier_class in (StackFrontier, QueueFrontier):
+            timings = benchmark_frontier(frontier_class, n)
+            print(f"{frontier_class.__name__} with {n} nodes")
+            for name, seconds in timings.items():
+                print(f"  {name}: {seconds:.3f}s total, {1e9 * seconds / n:.0f}ns per call")
+        return
+    if workers_mode:
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        n = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+        degrees.load_data(directory)
+        pairs = sample_pairs(n, seed=0)
+        timings = benchmark_workers(directory, pairs)
+        print(f"separation_histogram over {n} random pairs")
+        for workers, seconds in timings.items():
+            print(f"  {workers} workers: {seconds:.3f}s, "
+                  f"{timings[1] / seconds:.1f}x")
+        return
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    pairs = sample_pairs(n, seed=0)
+    timings = benchmark_search(pairs, graph)
+    print(f"Search over {n} random pairs")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.3f}s total, {1000 * seconds / n:.3f}ms per query")
+    print(f"  speedup: {timings['bfs'] / timings['bidirectional']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
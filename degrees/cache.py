@@ -0,0 +1,219 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from graph import array_path
+
+PATHS = 100000
+
+# Bytes of search trees kept, at 8 bytes per person in the graph each
+TREE_BYTES = 64 << 20
+
+# Cache misses from a source before its search tree may be built
+HOT = 16
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths on a StarGraph.
+
+    Paths are keyed by the unordered pair of people, so a cached path
+    from `a` to `b` also answers `b` to `a`. Sources that are queried
+    often have their whole breadth-first search tree cached, so every
+    later target from them is answered without a new search.
+
+    A tree costs a search of the source's whole component, often
+    thousands of times a bidirectional search, so it is only built for
+    a source after `hot` misses, and once the searches from it have
+    taken as long as the last tree did to build. Trees are stored as
+    arrays indexed by person and bounded by `tree_bytes` in total.
+    """
+
+    def __init__(self, graph, paths=PATHS, tree_bytes=TREE_BYTES, hot=HOT):
+        self.graph = graph
+        self.max_paths = paths
+        self.max_tree_bytes = tree_bytes
+        self.hot = hot
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.tree_bytes = 0
+        self.tree_seconds = 0
+
+        # Misses and seconds spent searching from each source
+        self.sources = {}
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+        # Bumped whenever cached results are dropped, so searches that
+        # were already running do not store stale paths
+        self.generation = 0
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, or None.
+
+        The lock is only held to look up and store results, so a slow
+        search does not hold up other threads' cache hits. A result is
+        not stored if the cache was invalidated while it was searched.
+        """
+        key = (source, target) if source <= target else (target, source)
+        with self.lock:
+            found, path = self._lookup(key, source, target)
+            if found:
+                return path
+            self.misses += 1
+            hot = self._is_hot(source)
+            generation = self.generation
+
+        tree = None
+        start = time.perf_counter()
+        if hot:
+            tree = self.graph.search_arrays(source)
+            path = array_path(tree, target)
+        else:
+            path = self.graph.shortest_path(source, target)
+        seconds = time.perf_counter() - start
+
+        with self.lock:
+            if tree is not None:
+                self.tree_seconds = seconds
+            elif source in self.sources:
+                self.sources[source][1] += seconds
+            if generation == self.generation:
+                if tree is not None:
+                    self._store_tree(source, tree)
+                self._store(key, source, path)
+        return path
+
+    def _lookup(self, key, source, target):
+        """
+        Returns (True, path) if the path is cached or can be read off a
+        cached search tree, else (False, None).
+        """
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            path = self.paths[key]
+            return True, (
+                path if key[0] == source else reverse_path(path, key[0]))
+
+        for root, other in ((source, target), (target, source)):
+            if root in self.trees:
+                self.trees.move_to_end(root)
+                self.tree_hits += 1
+                path = array_path(self.trees[root], other)
+                if root != source:
+                    path = reverse_path(path, target)
+                self._store(key, source, path)
+                return True, path
+        return False, None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "tree_hits": self.tree_hits,
+            "misses": self.misses,
+            "paths": len(self.paths),
+            "trees": len(self.trees),
+            "tree_bytes": self.tree_bytes
+        }
+
+    def invalidate(self, touched):
+        """
+        Drop the cached paths and trees that new edges between the
+        people in `touched` could have shortened.
+
+        Any new path between `a` and `b` runs through a touched person
+        at each end of a new edge, so it is at least
+        d(a, touched) + 1 + d(touched, b) long. Paths already no longer
+        than that are kept.
+        """
+        with self.lock:
+            self.generation += 1
+            longest = max(
+                (len(path) for path in self.paths.values() if path),
+                default=0)
+            distances = _distances(self.graph, touched, longest)
+
+            for key, path in list(self.paths.items()):
+                if path is None or (
+                        distances.get(key[0], longest)
+                        + distances.get(key[1], longest) + 1 < len(path)):
+                    del self.paths[key]
+            for source, (people, _) in list(self.trees.items()):
+                if any(person < len(people) and people[person] != -1
+                       for person in touched):
+                    self.tree_bytes -= _size(self.trees.pop(source))
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.paths.clear()
+            self.trees.clear()
+            self.tree_bytes = 0
+            self.sources.clear()
+
+    def _is_hot(self, source):
+        if len(self.sources) >= self.max_paths:
+            self.sources.clear()
+        counts = self.sources.setdefault(source, [0, 0])
+        counts[0] += 1
+        if counts[0] < self.hot or counts[1] < self.tree_seconds:
+            return False
+        del self.sources[source]
+        return True
+
+    def _store_tree(self, source, tree):
+        if source in self.trees:
+            self.tree_bytes -= _size(self.trees.pop(source))
+        if _size(tree) > self.max_tree_bytes:
+            return
+        self.trees[source] = tree
+        self.tree_bytes += _size(tree)
+        while self.tree_bytes > self.max_tree_bytes:
+            self.tree_bytes -= _size(self.trees.popitem(last=False)[1])
+
+    def _store(self, key, source, path):
+        # Stored in the key's direction, from key[0] to key[1]
+        if key[0] != source:
+            path = reverse_path(path, key[1])
+        self.paths[key] = path
+        if len(self.paths) > self.max_paths:
+            self.paths.popitem(last=False)
+
+
+def reverse_path(path, source):
+    """
+    Reverses a path that starts at `source`, so it leads back to it.
+    """
+    if path is None:
+        return None
+    people = [source] + [person for movie, person in path]
+    return [
+        (path[i][0], people[i])
+        for i in range(len(path) - 1, -1, -1)
+    ]
+
+
+def _size(tree):
+    return sum(len(a) * a.itemsize for a in tree)
+
+
+def _distances(graph, sources, limit):
+    """
+    Breadth-first distances from the nearest of `sources`, up to `limit`.
+    """
+    distances = dict.fromkeys(sources, 0)
+    layer = list(distances)
+    for depth in range(1, limit):
+        next_layer = []
+        for person in layer:
+            for movie, neighbor in graph.neighbors(person):
+                if neighbor not in distances:
+                    distances[neighbor] = depth
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return distances
@@ -1,7 +1,9 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from names import NameIndex
+from snapshot import load_snapshot
+from util import Node, StackFrontier, QueueFrontier, bidirectional_search
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,6 +14,9 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Prefix and typo-tolerant lookups of person_ids by name
+name_index = NameIndex([])
+
 
 def load_data(directory):
     """
@@ -51,25 +56,32 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Index names
+    global name_index
+    name_index = NameIndex(
+        (person["name"], person_id, person["birth"])
+        for person_id, person in people.items()
+    )
+
 
 def main():
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load data from a memory-mapped snapshot, rebuilding it if stale
     print("Loading data...")
-    load_data(directory)
+    graph = load_snapshot(directory)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_for_name(graph, input("Name: "))
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_for_name(graph, input("Name: "))
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,9 +90,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[path[i][1]]
+            person2 = graph.person_names[path[i + 1][1]]
+            movie = graph.movie_titles[path[i + 1][0]]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -91,17 +103,53 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    return bidirectional_search(source, target, neighbors_for_person)
+
+
+def shortest_path_bfs(source, target):
+    """
+    Single-ended breadth-first search from `source` over a QueueFrontier.
 
-    # TODO
-    raise NotImplementedError
+    Kept as the reference implementation that `shortest_path` is
+    benchmarked and checked against.
+    """
+    if source == target:
+        return []
+
+    start = Node(state=source, parent=None, action=None)
+    frontier = QueueFrontier()
+    frontier.add(start)
+    explored = set()
+
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for movie_id, person_id in neighbors_for_person(node.state):
+            if person_id in explored or frontier.contains_state(person_id):
+                continue
+            child = Node(state=person_id, parent=node, action=movie_id)
+            if person_id == target:
+                path = []
+                while child.parent is not None:
+                    path.append((child.action, child.state))
+                    child = child.parent
+                path.reverse()
+                return path
+            frontier.add(child)
+
+    return None
 
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Misspelled names resolve to the closest match, and a trailing birth
+    year such as "Chris Evans (1981)" picks between people of the same
+    name without prompting.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = name_index.resolve(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -122,6 +170,32 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_for_name(graph, name):
+    """
+    Returns the graph index for a person's name,
+    resolving ambiguities as needed.
+    """
+    people = graph.resolve_name(name)
+    if len(people) == 0:
+        return None
+    elif len(people) > 1:
+        print(f"Which '{name}'?")
+        for person in people:
+            person_id = graph.person_ids[person]
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
+            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+        try:
+            person = graph.person(input("Intended Person ID: "))
+            if person in people:
+                return person
+        except ValueError:
+            pass
+        return None
+    else:
+        return people[0]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
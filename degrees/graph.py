@@ -0,0 +1,459 @@
+import csv
+from array import array
+from bisect import bisect_left
+
+from names import YEAR, NameIndex
+from util import bidirectional_search
+
+
+class StarGraph():
+    """
+    Compact, integer-indexed form of the people/movies/stars dataset.
+
+    People and movies are interned to dense integers 0..n-1. The
+    bipartite star graph is stored as CSR adjacency in both directions:
+    the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    people in movie `m` are
+    `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    Rows added after the arrays were built are kept in small overlay
+    dicts alongside them until the graph is compacted.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_order, movie_order, name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # People sorted by id and by lowercase name, movies sorted by id,
+        # so lookups are binary searches rather than dicts
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+        self._name_index = None
+
+        # People, movies and stars added since the arrays were built
+        self.added_people = {}
+        self.added_movies = {}
+        self.added_names = {}
+        self.added_stars = {}
+        self.added_casts = {}
+
+    def person(self, person_id):
+        """
+        Returns the index of the person with IMDB id `person_id`, or None.
+        """
+        person = _search(self.person_order, self.person_ids, person_id)
+        if person is None:
+            return self.added_people.get(person_id)
+        return person
+
+    def movie(self, movie_id):
+        """
+        Returns the index of the movie with IMDB id `movie_id`, or None.
+        """
+        movie = _search(self.movie_order, self.movie_ids, movie_id)
+        if movie is None:
+            return self.added_movies.get(movie_id)
+        return movie
+
+    def people_named(self, name):
+        """
+        Returns the indices of every person called `name`, ignoring case.
+        """
+        name = name.lower()
+        names = self.person_names
+        order = self.name_order
+        i = bisect_left(order, name, key=lambda p: names[p].lower())
+        people = []
+        while i < len(order) and names[order[i]].lower() == name:
+            people.append(order[i])
+            i += 1
+        return people + self.added_names.get(name, [])
+
+    def resolve_name(self, query):
+        """
+        Returns the indices of the people best matching `query`, as
+        NameIndex.resolve does, but only builds the fuzzy name index
+        when no one is called exactly that.
+        """
+        match = YEAR.match(query)
+        name, birth = (match.group(1), match.group(2)) if match else (
+            query, None)
+        people = self.people_named(name)
+        if not people:
+            return self.name_index().resolve(query)
+        if birth is not None:
+            people = [
+                person for person in people
+                if self.person_births[person] == birth
+            ]
+        return people
+
+    def name_index(self):
+        """
+        Returns a NameIndex over every person, building it on first use.
+        """
+        if self._name_index is None:
+            self._name_index = NameIndex(
+                (self.person_names[person], person, self.person_births[person])
+                for person in range(len(self.person_ids))
+            )
+        return self._name_index
+
+    def movies_for_person(self, person):
+        movies = []
+        if person < len(self.person_offsets) - 1:
+            movies = self.person_movies[
+                self.person_offsets[person]:self.person_offsets[person + 1]]
+        if person in self.added_stars:
+            movies = list(movies) + self.added_stars[person]
+        return movies
+
+    def people_for_movie(self, movie):
+        people = []
+        if movie < len(self.movie_offsets) - 1:
+            people = self.movie_people[
+                self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        if movie in self.added_casts:
+            people = list(people) + self.added_casts[movie]
+        return people
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with a given person.
+        """
+        if self.added_stars or self.added_people:
+            for movie in self.movies_for_person(person):
+                for neighbor in self.people_for_movie(movie):
+                    yield movie, neighbor
+            return
+
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, or None.
+        """
+        return bidirectional_search(source, target, self.neighbors)
+
+    def search_tree(self, source, targets=None):
+        """
+        Breadth-first search from `source`.
+
+        Returns a dict mapping every person reached to the (movie, person)
+        pair they were reached from. If `targets` is given, the search
+        stops once all of them have been reached.
+        """
+        parents = {source: None}
+        remaining = None if targets is None else set(targets) - {source}
+        layer = [source]
+        while layer and remaining != set():
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in self.neighbors(person):
+                    if neighbor not in parents:
+                        parents[neighbor] = (movie, person)
+                        next_layer.append(neighbor)
+                        if remaining is not None:
+                            remaining.discard(neighbor)
+            layer = next_layer
+        return parents
+
+    def search_arrays(self, source):
+        """
+        Breadth-first search from `source` over its whole component,
+        kept compact for caching.
+
+        Returns a pair of array("i") indexed by person: the person each
+        was reached from, and the movie that links them. People not
+        reached have -1 in both, and the source is its own parent.
+        """
+        people = array("i", [-1]) * len(self.person_ids)
+        movies = array("i", [-1]) * len(self.person_ids)
+        people[source] = source
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in self.neighbors(person):
+                    if people[neighbor] == -1:
+                        people[neighbor] = person
+                        movies[neighbor] = movie
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return people, movies
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person unless they are already in the graph,
+        returning their index either way.
+        """
+        person = self.person(person_id)
+        if person is None:
+            self._extend()
+            person = len(self.person_ids)
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(birth)
+            self.added_people[person_id] = person
+            self.added_names.setdefault(name.lower(), []).append(person)
+            self._name_index = None
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie unless it is already in the graph,
+        returning its index either way.
+        """
+        movie = self.movie(movie_id)
+        if movie is None:
+            self._extend()
+            movie = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+            self.added_movies[movie_id] = movie
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Records that `person` starred in `movie`.
+        Returns False if that was already known.
+        """
+        if person in self.people_for_movie(movie):
+            return False
+        self.added_stars.setdefault(person, []).append(movie)
+        self.added_casts.setdefault(movie, []).append(person)
+        return True
+
+    def add_rows(self, people=(), movies=(), stars=()):
+        """
+        Adds rows shaped like those of people.csv, movies.csv and
+        stars.csv, skipping stars of unknown people or movies.
+
+        Returns the set of people whose co-stars changed, that is,
+        everyone in a movie that gained a star.
+        """
+        for row in people:
+            self.add_person(row["id"], row["name"], row["birth"])
+        for row in movies:
+            self.add_movie(row["id"], row["title"], row["year"])
+
+        changed = set()
+        for row in stars:
+            person = self.person(row["person_id"])
+            movie = self.movie(row["movie_id"])
+            if person is None or movie is None:
+                continue
+            if self.add_star(person, movie):
+                changed.add(movie)
+
+        touched = set()
+        for movie in changed:
+            touched.update(self.people_for_movie(movie))
+        return touched
+
+    def compacted(self):
+        """
+        Returns an equivalent StarGraph with every added row folded
+        into the CSR arrays.
+        """
+        edges = [
+            (person, movie)
+            for person in range(len(self.person_ids))
+            for movie in self.movies_for_person(person)
+        ]
+        return build_graph(
+            list(self.person_ids), list(self.person_names),
+            list(self.person_births), list(self.movie_ids),
+            list(self.movie_titles), list(self.movie_years), edges)
+
+    def _extend(self):
+        # The stored sequences may be read-only, so appends go to an overlay
+        if not isinstance(self.person_ids, Extended):
+            for name in ("person_ids", "person_names", "person_births",
+                         "movie_ids", "movie_titles", "movie_years"):
+                setattr(self, name, Extended(getattr(self, name)))
+
+    def translate(self, path):
+        """
+        Converts a path of (movie, person) indices back into
+        (movie_id, person_id) pairs.
+        """
+        if path is None:
+            return None
+        return [
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in path
+        ]
+
+
+class Extended():
+    """
+    A sequence that can be appended to, built on one that may not be.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.extra = []
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, i):
+        if i < len(self.base):
+            return self.base[i]
+        return self.extra[i - len(self.base)]
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.extra
+
+    def append(self, value):
+        self.extra.append(value)
+
+
+def tree_path(parents, target):
+    """
+    Returns the path to `target` in a search tree from `search_tree`,
+    or None if the target was not reached.
+    """
+    if target not in parents:
+        return None
+    path = []
+    while parents[target] is not None:
+        movie, person = parents[target]
+        path.append((movie, target))
+        target = person
+    path.reverse()
+    return path
+
+
+def array_path(tree, target):
+    """
+    Returns the path to `target` in a search tree from `search_arrays`,
+    or None if the target was not reached.
+    """
+    people, movies = tree
+    if target >= len(people) or people[target] == -1:
+        return None
+    path = []
+    while people[target] != target:
+        path.append((movies[target], target))
+        target = people[target]
+    path.reverse()
+    return path
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a StarGraph.
+    """
+    # Load people
+    person_ids, person_names, person_births = [], [], []
+    person_index = {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+
+    # Load movies
+    movie_ids, movie_titles, movie_years = [], [], []
+    movie_index = {}
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+
+    # Load stars as (person, movie) edges, dropping duplicates
+    edges = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            edges.add((person, movie))
+
+    return build_graph(person_ids, person_names, person_births,
+                       movie_ids, movie_titles, movie_years, edges)
+
+
+def build_graph(person_ids, person_names, person_births,
+                movie_ids, movie_titles, movie_years, edges):
+    """
+    Build a StarGraph from interned people and movies and an iterable
+    of (person, movie) index edges.
+    """
+    edges = sorted(edges)
+    person_offsets, person_movies = _csr(
+        len(person_ids), edges, 0, 1)
+    edges.sort(key=lambda edge: edge[1])
+    movie_offsets, movie_people = _csr(
+        len(movie_ids), edges, 1, 0)
+
+    return StarGraph(
+        person_ids, person_names, person_births,
+        movie_ids, movie_titles, movie_years,
+        person_offsets, person_movies, movie_offsets, movie_people,
+        person_order=_order(person_ids),
+        movie_order=_order(movie_ids),
+        name_order=_order(name.lower() for name in person_names)
+    )
+
+
+def _csr(n, edges, row, column):
+    """
+    Convert `edges`, sorted by their `row` field, into offsets and indices.
+    """
+    offsets = array("i", bytes(4 * (n + 1)))
+    indices = array("i", (edge[column] for edge in edges))
+    for edge in edges:
+        offsets[edge[row] + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    return offsets, indices
+
+
+def _order(keys):
+    """
+    Returns the indices of `keys` as an array, sorted by key.
+    """
+    keys = list(keys)
+    return array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def _search(order, keys, key):
+    i = bisect_left(order, key, key=keys.__getitem__)
+    if i < len(order) and keys[order[i]] == key:
+        return order[i]
+    return None
@@ -0,0 +1,90 @@
+import csv
+import sys
+
+from snapshot import (SOURCES, append_journal, load_snapshot,
+                      read_snapshot, snapshot_path, source_signature,
+                      write_snapshot)
+
+
+def read_tail(path, offset):
+    """
+    Returns the rows of the CSV file at `path` that start at byte
+    `offset`, using the field names from its header.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        fieldnames = next(csv.reader(f))
+    with open(path, "rb") as f:
+        f.seek(offset)
+        tail = f.read().decode("utf-8")
+    return list(csv.DictReader(tail.splitlines(), fieldnames=fieldnames))
+
+
+def ingest(graph, people=(), movies=(), stars=(), cache=None,
+           signature=None, oracle=None):
+    """
+    Add people, movies and stars rows to `graph` in place.
+
+    The rows are journaled to the graph's snapshot, if it has one,
+    which is then stamped with `signature`. Only the paths in `cache`
+    that the new edges could shorten are invalidated, and a landmark
+    `oracle` is marked stale if any edges were added. Returns the set
+    of people whose co-stars changed.
+    """
+    people, movies, stars = list(people), list(movies), list(stars)
+    touched = graph.add_rows(people, movies, stars)
+    if getattr(graph, "path", None) is not None:
+        signature = signature or graph.signature
+        append_journal(graph.path, signature, people, movies, stars)
+        graph.signature = signature
+    if cache is not None and touched:
+        cache.invalidate(touched)
+    if oracle is not None and touched:
+        oracle.stale = True
+    return touched
+
+
+def ingest_appended(directory, graph, cache=None, oracle=None):
+    """
+    Add the rows appended to `directory`'s CSV files since `graph`'s
+    snapshot was last stamped.
+
+    Raises ValueError if a file shrank, since then it was rewritten
+    rather than appended to and the snapshot has to be rebuilt.
+    """
+    signature = source_signature(directory)
+    tails = []
+    for i, filename in enumerate(SOURCES):
+        size = graph.signature[2 * i]
+        if signature[2 * i] < size:
+            raise ValueError(f"{filename} shrank, rebuild the snapshot")
+        tails.append(read_tail(f"{directory}/{filename}", size))
+    people, movies, stars = tails
+    touched = ingest(graph, people, movies, stars, cache, signature, oracle)
+    return len(people), len(movies), len(stars), len(touched)
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or (
+            len(sys.argv) == 3 and sys.argv[2] != "--compact"):
+        sys.exit("Usage: python ingest.py directory [--compact]")
+    directory = sys.argv[1]
+
+    # Opening the snapshot with the old signature keeps it from being
+    # rebuilt just because the CSV files grew
+    try:
+        graph = read_snapshot(snapshot_path(directory))
+    except (OSError, ValueError):
+        load_snapshot(directory)
+        sys.exit("Snapshot built, nothing to ingest.")
+
+    counts = ingest_appended(directory, graph)
+    print("Ingested {} people, {} movies and {} stars "
+          "touching {} people.".format(*counts))
+
+    if len(sys.argv) == 3:
+        write_snapshot(graph, graph.path, graph.signature)
+        print("Snapshot compacted.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from snapshot import load_snapshot, source_signature
+
+MAGIC = b"DEGLAND1"
+LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+HEADER = struct.Struct("<6qqq")
+
+
+class LandmarkOracle():
+    """
+    Precomputed breadth-first distances from a few landmark people.
+
+    Distances are stored person-major, so the distances from every
+    landmark to person `p` are the bytes
+    `distances[p * k:(p + 1) * k]`. By the triangle inequality,
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b) for every
+    landmark L, which bounds any separation in O(k).
+
+    Once edges are added to the graph the oracle is marked `stale`:
+    new edges only ever shorten paths, so its upper bounds still hold,
+    but its lower bounds and "not connected" answers may not.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.stale = False
+
+    def covers(self, person):
+        """
+        Returns True if the oracle holds distances for `person`, which
+        people added since it was built do not.
+        """
+        k = len(self.landmarks)
+        return k > 0 and (person + 1) * k <= len(self.distances)
+
+    def bounds(self, a, b):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between people `a` and `b`.
+
+        Returns (None, None) if they are certainly not connected, and
+        an upper bound of None if no landmark reaches both of them,
+        or either was added after the oracle was built. A stale oracle
+        only gives upper bounds, with a lower bound of 1.
+        """
+        if a == b:
+            return 0, 0
+        if not (self.covers(a) and self.covers(b)):
+            return 1, None
+        k = len(self.landmarks)
+        da = self.distances[a * k:(a + 1) * k]
+        db = self.distances[b * k:(b + 1) * k]
+        lower, upper = 1, None
+        for x, y in zip(da, db):
+            if x == UNREACHABLE and y == UNREACHABLE:
+                continue
+            if x == UNREACHABLE or y == UNREACHABLE:
+                if self.stale:
+                    continue
+                return None, None
+            if not self.stale:
+                lower = max(lower, abs(x - y))
+            upper = x + y if upper is None else min(upper, x + y)
+        return lower, upper
+
+    def separation(self, graph, a, b, exact=False):
+        """
+        Returns (lower, upper) bounds, or the exact degrees of
+        separation as (d, d) if `exact` is true or the bounds meet.
+
+        People the oracle does not cover, and everyone once the oracle
+        is stale, are always searched exactly.
+        """
+        lower, upper = self.bounds(a, b)
+        covered = self.covers(a) and self.covers(b)
+        if self.stale or not covered or (exact and lower != upper):
+            path = graph.shortest_path(a, b)
+            d = None if path is None else len(path)
+            return d, d
+        return lower, upper
+
+
+def select_landmarks(graph, k=LANDMARKS):
+    """
+    Returns the `k` people with the most co-star links.
+    """
+    degrees = []
+    for person in range(len(graph.person_ids)):
+        degree = 0
+        for movie in graph.movies_for_person(person):
+            degree += len(graph.people_for_movie(movie))
+        degrees.append(degree)
+    return sorted(range(len(degrees)), key=lambda p: -degrees[p])[:k]
+
+
+def build_oracle(graph, landmarks):
+    """
+    Run a breadth-first search from each landmark, returning a
+    LandmarkOracle over the resulting distances.
+    """
+    n = len(graph.person_ids)
+    k = len(landmarks)
+    distances = bytearray([UNREACHABLE]) * (n * k)
+    for column, landmark in enumerate(landmarks):
+        distances[landmark * k + column] = 0
+        layer = [landmark]
+        depth = 0
+        while layer and depth < UNREACHABLE - 1:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in graph.neighbors(person):
+                    if distances[neighbor * k + column] == UNREACHABLE:
+                        distances[neighbor * k + column] = depth
+                        next_layer.append(neighbor)
+            layer = next_layer
+    return LandmarkOracle(array("i", landmarks), distances)
+
+
+def oracle_path(directory):
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def write_oracle(oracle, path, signature):
+    """
+    Write `oracle` to `path`, atomically.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(*signature, len(oracle.landmarks),
+                            len(oracle.distances)))
+        f.write(oracle.landmarks.tobytes())
+        f.write(oracle.distances)
+    os.replace(temporary, path)
+
+
+def read_oracle(path, signature=None):
+    """
+    Memory-map the landmark distances stored at `path`.
+
+    Raises ValueError if the file is not a landmark file, is truncated,
+    or was built from data other than `signature`.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    start = len(MAGIC) + HEADER.size
+    if len(buffer) < start or buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a landmark file")
+    header = HEADER.unpack_from(buffer, len(MAGIC))
+    if signature is not None and header[:6] != tuple(signature):
+        raise ValueError(f"{path} is out of date")
+    k, size = header[6:]
+    if k < 0 or size < 0 or start + 4 * k + size != len(buffer) or (
+            k and size % k):
+        raise ValueError(f"{path} is truncated or corrupt")
+    landmarks = array("i", buffer[start:start + 4 * k])
+    distances = memoryview(buffer)[start + 4 * k:start + 4 * k + size]
+    return LandmarkOracle(landmarks, distances)
+
+
+def load_oracle(directory, graph=None, k=LANDMARKS):
+    """
+    Load the landmark oracle for `directory`, building it first
+    if it is missing, the data has changed, or `graph` has people
+    the oracle does not cover.
+
+    If the oracle cannot be written, such as in a read-only directory,
+    the one built in memory is returned as is.
+    """
+    path = oracle_path(directory)
+    signature = source_signature(directory)
+    try:
+        oracle = read_oracle(path, signature)
+        if graph is None or oracle.covers(len(graph.person_ids) - 1):
+            return oracle
+    except (OSError, ValueError):
+        pass
+    graph = graph or load_snapshot(directory)
+    oracle = build_oracle(graph, select_landmarks(graph, k))
+    try:
+        write_oracle(oracle, path, signature)
+    except OSError:
+        return oracle
+    return read_oracle(path, signature)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+
+    graph = load_snapshot(directory)
+    landmarks = select_landmarks(graph, k)
+    print(f"Landmarks: {', '.join(graph.person_names[p] for p in landmarks)}")
+    write_oracle(build_oracle(graph, landmarks), oracle_path(directory),
+                 source_signature(directory))
+    print(f"Distances written to {oracle_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
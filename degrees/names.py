@@ -0,0 +1,190 @@
+import re
+from array import array
+from bisect import bisect_left
+
+# Matches a trailing birth year, as in "Chris Evans (1981)"
+YEAR = re.compile(r"^(.*?)\s*\((\d{4})\)\s*$")
+
+
+class NameIndex():
+    """
+    Lookup index over people's names.
+
+    Exact and prefix lookups binary search a sorted list of lowercase
+    names. Typo-tolerant lookups go through an inverted index of the
+    words in each name, where every word is also filed under each of
+    its one-letter deletions, so any word within one edit of a query
+    word is found with a handful of dict lookups.
+    """
+
+    def __init__(self, entries):
+        """
+        `entries` is an iterable of (name, key, birth) triples, where
+        `key` is whatever identifies the person to the caller.
+        """
+        entries = sorted(
+            (name.lower(), key, birth) for name, key, birth in entries)
+        self.names = [entry[0] for entry in entries]
+        self.keys = [entry[1] for entry in entries]
+        self.births = [entry[2] for entry in entries]
+
+        # Maps each word to the first entry of every distinct name using it
+        self.words = {}
+        for i, name in enumerate(self.names):
+            if i > 0 and self.names[i - 1] == name:
+                continue
+            for word in set(name.split()):
+                self.words.setdefault(word, array("i")).append(i)
+
+        # Maps each word, and each of its one-letter deletions, to words
+        self.deletions = {}
+        for word in self.words:
+            for variant in _deletions(word):
+                self.deletions.setdefault(variant, []).append(word)
+
+    def exact(self, name):
+        """
+        Returns the keys of every person called `name`, ignoring case.
+        """
+        return [self.keys[i] for i in self._exact(name.lower())]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (name, key) pairs whose name starts with
+        `prefix`, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        i = bisect_left(self.names, prefix)
+        matches = []
+        while (i < len(self.names) and len(matches) < limit
+               and self.names[i].startswith(prefix)):
+            matches.append((self.names[i], self.keys[i]))
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, name, key) triples for people
+        whose name is within `max_distance` edits of `name`, closest first.
+
+        Only names with the same number of words, each within one edit
+        of the matching query word, are considered.
+        """
+        results = []
+        for distance, match, i in self._fuzzy(name, max_distance):
+            results.extend((distance, match, j) for j in self._exact(match, i))
+            if len(results) >= limit:
+                break
+        return [
+            (distance, match, self.keys[i])
+            for distance, match, i in results[:limit]
+        ]
+
+    def resolve(self, query, max_distance=2):
+        """
+        Returns the keys of the people best matching `query`.
+
+        A trailing "(year)" in the query picks out people born in that
+        year. Exact matches win; otherwise the closest fuzzy matches are
+        returned, so one person is returned whenever the query is
+        unambiguous.
+        """
+        match = YEAR.match(query)
+        name, birth = (match.group(1), match.group(2)) if match else (
+            query, None)
+
+        found = list(self._exact(name.lower()))
+        best = None
+        if not found:
+            for distance, match, i in self._fuzzy(name, max_distance):
+                if found and distance > best:
+                    break
+                best = distance
+                found.extend(self._exact(match, i))
+        if birth is not None:
+            found = [i for i in found if self.births[i] == birth]
+        return [self.keys[i] for i in found]
+
+    def _exact(self, name, start=None):
+        """
+        Returns the range of entries called `name`, which is
+        lowercase. `start` is the first of them, if already known.
+        """
+        start = bisect_left(self.names, name) if start is None else start
+        end = start
+        while end < len(self.names) and self.names[end] == name:
+            end += 1
+        return range(start, end)
+
+    def _fuzzy(self, name, max_distance):
+        """
+        Returns (distance, name, first entry) for every distinct name
+        within `max_distance` edits of `name`, closest first.
+        """
+        name = name.lower()
+        words = name.split()
+        if not words:
+            return []
+
+        # Names containing a near match for every word, rarest word first
+        postings = sorted(
+            (self._near(word) for word in set(words)), key=len)
+        candidates = postings[0]
+        for entries in postings[1:]:
+            candidates = candidates & entries
+            if not candidates:
+                return []
+
+        matches = []
+        for i in sorted(candidates):
+            other = self.names[i]
+            if len(other.split()) != len(words):
+                continue
+            distance = edit_distance(name, other, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, other, i))
+        matches.sort()
+        return matches
+
+    def _near(self, word):
+        """
+        Returns the entries whose name has a word within one edit of `word`.
+        """
+        entries = set()
+        seen = set()
+        for variant in _deletions(word):
+            for other in self.deletions.get(variant, ()):
+                if other not in seen:
+                    seen.add(other)
+                    if edit_distance(word, other, 1) <= 1:
+                        entries.update(self.words[other])
+        return entries
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between `a` and `b`, or `limit + 1` as soon as
+    it is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _deletions(word):
+    """
+    Returns `word` and every string made by deleting one letter from it.
+    """
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
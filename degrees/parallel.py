@@ -0,0 +1,117 @@
+import sys
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+
+from graph import tree_path
+from snapshot import load_snapshot
+
+# The graph each worker process answers queries from
+graph = None
+
+
+def shortest_paths(directory, pairs, workers=None):
+    """
+    Returns a dict mapping every (source_id, target_id) in `pairs` to
+    the shortest list of (movie_id, person_id) pairs between them,
+    or None if they are not connected.
+
+    Queries are grouped by source and spread over `workers` processes,
+    each of which memory-maps the same snapshot of `directory`.
+    """
+    init(directory)
+    tasks = group_by_source(pairs)
+
+    results = {}
+    for source, target, path in _run(directory, tasks, workers):
+        results[(graph.person_ids[source], graph.person_ids[target])] = (
+            graph.translate(path))
+    return results
+
+
+def separation_histogram(directory, pairs, workers=None):
+    """
+    Returns a Counter of degrees of separation over `pairs`, where
+    disconnected pairs are counted under None.
+    """
+    init(directory)
+    tasks = group_by_source(pairs)
+
+    histogram = Counter()
+    for source, target, path in _run(directory, tasks, workers):
+        histogram[None if path is None else len(path)] += 1
+    return histogram
+
+
+def group_by_source(pairs):
+    """
+    Converts (source_id, target_id) pairs into a list of
+    (source, targets) tasks over graph indices.
+
+    Raises KeyError for ids that are not in the graph.
+    """
+    targets = defaultdict(list)
+    for source_id, target_id in pairs:
+        source, target = graph.person(source_id), graph.person(target_id)
+        if source is None or target is None:
+            raise KeyError(source_id if source is None else target_id)
+        targets[source].append(target)
+
+    # Largest groups first, so no worker is left with one at the end
+    return sorted(targets.items(), key=lambda task: -len(task[1]))
+
+
+def init(directory):
+    global graph
+    graph = load_snapshot(directory)
+
+
+def solve(task):
+    """
+    Answer every query for one source, returning
+    (source, target, path) triples over graph indices.
+    """
+    source, targets = task
+
+    # A single target is cheapest to find by searching from both ends,
+    # several are cheapest to find with one search from the source
+    if len(targets) == 1:
+        return [(source, targets[0],
+                 graph.shortest_path(source, targets[0]))]
+    parents = graph.search_tree(source, targets)
+    return [
+        (source, target, tree_path(parents, target))
+        for target in targets
+    ]
+
+
+def _run(directory, tasks, workers):
+    if workers == 1:
+        for task in tasks:
+            yield from solve(task)
+        return
+    with Pool(workers, initializer=init, initargs=(directory,)) as pool:
+        for results in pool.imap_unordered(solve, tasks, chunksize=4):
+            yield from results
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python parallel.py directory pairs.csv [workers]")
+    directory = sys.argv[1]
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    # Each line of the pairs file is source_id,target_id
+    with open(sys.argv[2], encoding="utf-8") as f:
+        pairs = [
+            tuple(field.strip() for field in line.split(","))
+            for line in f if line.strip()
+        ]
+
+    histogram = separation_histogram(directory, pairs, workers)
+    for degrees in sorted(histogram, key=lambda d: (d is None, d)):
+        label = "Not connected" if degrees is None else f"{degrees} degrees"
+        print(f"{label}: {histogram[degrees]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import StarGraph, load_graph
+
+MAGIC = b"DEGSNAP1"
+
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Integer arrays, then string tables, in the order they are written
+ARRAYS = (
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+    "person_order", "movie_order", "name_order"
+)
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+
+# Header: magic, (size, mtime) of each source CSV, then an
+# (offset, length) pair for every section
+SIGNATURE = struct.Struct(f"<{2 * len(SOURCES)}q")
+SECTIONS = struct.Struct(f"<{2 * (len(ARRAYS) + 2 * len(STRINGS))}q")
+HEADER_SIZE = len(MAGIC) + SIGNATURE.size + SECTIONS.size
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as UTF-8 bytes plus offsets.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def journal_path(path):
+    """
+    Returns the path of the journal of rows added to the snapshot at `path`.
+    """
+    return f"{path}.journal"
+
+
+def source_signature(directory):
+    """
+    Returns the (size, mtime) of every source CSV in `directory`.
+    """
+    signature = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature.extend((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_snapshot(directory, path=None):
+    """
+    Load a StarGraph for `directory`, memory-mapping its snapshot.
+
+    The snapshot is (re)built from the CSV files first if it is missing
+    or if any of them changed since it was written. Rows appended
+    through `ingest` are replayed from its journal.
+
+    If the snapshot cannot be written, such as in a read-only
+    directory, the graph loaded from the CSV files is returned as is.
+    """
+    path = path or snapshot_path(directory)
+    signature = source_signature(directory)
+    try:
+        return read_snapshot(path, signature)
+    except (OSError, ValueError, struct.error):
+        pass
+    graph = load_graph(directory)
+    try:
+        write_snapshot(graph, path, signature)
+    except OSError:
+        return graph
+    return read_snapshot(path, signature)
+
+
+def write_snapshot(graph, path, signature):
+    """
+    Write `graph` to `path` in the snapshot format, atomically.
+
+    Any rows added to the graph are compacted into the snapshot, and
+    the journal at `path` is discarded.
+    """
+    if graph.added_people or graph.added_movies or graph.added_stars:
+        graph = graph.compacted()
+
+    sections = []
+    for name in ARRAYS:
+        sections.append(array("i", getattr(graph, name)).tobytes())
+    for name in STRINGS:
+        offsets, data = _encode(getattr(graph, name))
+        sections.append(offsets.tobytes())
+        sections.append(data)
+
+    # Lay out sections after the header, each aligned to 8 bytes
+    table = []
+    position = HEADER_SIZE
+    for section in sections:
+        position += -position % 8
+        table.extend((position, len(section)))
+        position += len(section)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(SIGNATURE.pack(*signature))
+        f.write(SECTIONS.pack(*table))
+        for offset, section in zip(table[::2], sections):
+            f.write(bytes(offset - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
+
+
+def append_journal(path, signature, people=(), movies=(), stars=()):
+    """
+    Record rows added to the snapshot at `path` in its journal, then
+    update the signature in its header in place to `signature`.
+    """
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "people": list(people),
+            "movies": list(movies),
+            "stars": list(stars)
+        }) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    with open(path, "r+b") as f:
+        f.seek(len(MAGIC))
+        f.write(SIGNATURE.pack(*signature))
+
+
+def read_snapshot(path, signature=None):
+    """
+    Memory-map the snapshot at `path` and return a StarGraph over it.
+
+    Raises ValueError if the file is not a snapshot, is truncated, or
+    if `signature` is given and does not match the one the snapshot
+    was built from.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    if len(view) < HEADER_SIZE or bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a degrees snapshot")
+    stored = SIGNATURE.unpack_from(view, len(MAGIC))
+    if signature is not None and stored != tuple(signature):
+        raise ValueError(f"{path} is out of date")
+    table = SECTIONS.unpack_from(view, len(MAGIC) + SIGNATURE.size)
+    sizes = [4] * len(ARRAYS) + [8, 1] * len(STRINGS)
+    for offset, length, size in zip(table[::2], table[1::2], sizes):
+        if (offset < HEADER_SIZE or length < 0 or length % size
+                or offset + length > len(view)):
+            raise ValueError(f"{path} is truncated or corrupt")
+    sections = [
+        view[offset:offset + length]
+        for offset, length in zip(table[::2], table[1::2])
+    ]
+
+    fields = {}
+    for name in ARRAYS:
+        fields[name] = sections.pop(0).cast("i")
+    for name in STRINGS:
+        offsets = sections.pop(0).cast("q")
+        fields[name] = StringTable(offsets, sections.pop(0))
+
+    graph = StarGraph(**fields)
+    graph.path = path
+    graph.signature = stored
+
+    # Replay rows added since the snapshot was written
+    if os.path.exists(journal_path(path)):
+        with open(journal_path(path), encoding="utf-8") as f:
+            for line in f:
+                graph.add_rows(**json.loads(line))
+    return graph
+
+
+def _encode(strings):
+    offsets = array("q", [0])
+    data = bytearray()
+    for string in strings:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, bytes(data)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    path = snapshot_path(directory)
+    print(f"Building {path}...")
+    write_snapshot(load_graph(directory), path, source_signature(directory))
+    print("Snapshot written.")
+
+
+if __name__ == "__main__":
+    main()
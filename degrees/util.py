@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Counts of the states currently in the frontier, for O(1) lookups
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +29,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._forget(node.state)
             return node
 
+    def _forget(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +47,98 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._forget(node.state)
             return node
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Breadth-first search that grows from `source` and `target` at the
+    same time until the two searches meet.
+
+    `neighbors(state)` must return (action, state) pairs and the graph
+    must be undirected. Returns the shortest list of (action, state)
+    pairs leading from source to target, or None if there is no path.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached state to the (action, state) pair it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always expand the smaller side, one whole layer at a time
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = _expand_layer(
+                forward_layer, forward, backward, neighbors)
+        else:
+            backward_layer, meeting = _expand_layer(
+                backward_layer, backward, forward, neighbors)
+
+        if meeting is not None:
+            return _join_paths(meeting, forward, backward)
+
+    return None
+
+
+def _expand_layer(layer, parents, other_parents, neighbors):
+    """
+    Expand every state in `layer`, recording parents as we go.
+
+    Returns the next layer and the best edge joining the two searches,
+    if any. Checking the whole layer before stopping is what keeps the
+    joined path shortest.
+    """
+    next_layer = []
+    meeting = None
+    best = None
+    for state in layer:
+        for action, neighbor in neighbors(state):
+            if neighbor in other_parents:
+                length = _depth(neighbor, other_parents)
+                if best is None or length < best:
+                    best = length
+                    meeting = (state, action, neighbor, parents)
+            if neighbor not in parents:
+                parents[neighbor] = (action, state)
+                next_layer.append(neighbor)
+    return next_layer, meeting
+
+
+def _depth(state, parents):
+    depth = 0
+    while parents[state] is not None:
+        state = parents[state][1]
+        depth += 1
+    return depth
+
+
+def _join_paths(meeting, forward, backward):
+    """
+    Build the source-to-target path through the joining edge
+    `state` --`action`-- `neighbor`.
+    """
+    state, action, neighbor, side = meeting
+    if side is forward:
+        left, link, right = state, (action, neighbor), neighbor
+    else:
+        left, link, right = neighbor, (action, state), state
+
+    # Walk back from the left end to the source
+    path = []
+    while forward[left] is not None:
+        path.append((forward[left][0], left))
+        left = forward[left][1]
+    path.reverse()
+    path.append(link)
+
+    # Walk forward from the right end to the target
+    while backward[right] is not None:
+        action, right = backward[right]
+        path.append((action, right))
+    return path
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from multiprocessing import Pool
+
+from heredity import load_data
+from inference import cluster_tree, infer, structure
+
+# Cluster trees each worker keeps for the family structures it has seen
+CACHE_SIZE = 1024
+
+
+def family_files(path):
+    """
+    Return the pedigree files to score: every .csv file in `path` if it
+    is a directory, else the files listed one per line in the manifest
+    at `path` (relative to the manifest), skipping blank lines and
+    lines starting with "#".
+    """
+    if os.path.isdir(path):
+        return [
+            os.path.join(path, filename)
+            for filename in sorted(os.listdir(path))
+            if filename.endswith(".csv")
+        ]
+    directory = os.path.dirname(path)
+    with open(path) as f:
+        return [
+            os.path.join(directory, line.strip())
+            for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compiled(parents):
+    """
+    Return the cluster tree for families with structure `parents`,
+    built once per worker and shared by every family with that shape.
+    """
+    return cluster_tree(parents)
+
+
+def score(filename):
+    """
+    Run exact inference on one pedigree file, returning a JSON-ready
+    dict of every person's distributions and the time taken in
+    milliseconds, or an "error" if the file could not be scored.
+    """
+    start = time.perf_counter()
+    try:
+        people = load_data(filename)
+        probabilities = infer(people, compiled(structure(people)))
+    except (OSError, KeyError, ValueError) as e:
+        result = {"file": filename, "error": f"{type(e).__name__}: {e}"}
+    else:
+        result = {"file": filename, "people": probabilities}
+    result["ms"] = round(1000 * (time.perf_counter() - start), 3)
+    return result
+
+
+def run_batch(filenames, out, workers=None):
+    """
+    Score every file in `filenames` across a pool of `workers`
+    processes, writing one JSON result per line to `out` in order, as
+    soon as each is ready.
+
+    Returns (files scored, total seconds).
+    """
+    count = 0
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        for result in pool.imap(score, filenames, chunksize=16):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python batch.py directory|manifest [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    count, seconds = run_batch(family_files(sys.argv[1]), sys.stdout, workers)
+    print(f"Scored {count} families in {seconds:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -64,31 +64,22 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and             # checking if person is present in the database.
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene       ??
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):     # only two_gene set 
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Loop over every assignment consistent with known information
+    names = list(people)
+    for one_gene, two_genes, have_trait, p in assignments(people):
+        update_masks(probabilities, names, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
     # Print results
+    print_probabilities(people, probabilities)
+
+
+def print_probabilities(people, probabilities):
+    """
+    Print each person's gene and trait distributions.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -134,6 +125,89 @@ def powerset(s):
     ]
 
 
+def assignments(people):
+    """
+    Lazily generate every assignment of genes and traits that agrees
+    with the known traits, along with its joint probability.
+
+    Yields tuples (one_gene, two_genes, have_trait, p) where the first
+    three are bitmasks, bit i standing for the i-th person in `people`.
+    People with a known trait only ever get that trait. Parents are
+    assigned before their children, so the product of the factors for
+    everyone assigned so far, the founders' included, is computed once
+    and shared by every assignment of the people after them.
+    """
+    bits = {person: 1 << i for i, person in enumerate(people)}
+    order = parents_first(people)
+    genes = {}
+    inherited = {
+        (gene, mother, father): inheritance(gene, mother, father)
+        for gene, mother, father in itertools.product((0, 1, 2), repeat=3)
+    }
+
+    def extend(depth, one_gene, two_genes, have_trait, p):
+        if depth == len(order):
+            yield one_gene, two_genes, have_trait, p
+            return
+        person = order[depth]
+        mother, father = people[person]["mother"], people[person]["father"]
+        trait = people[person]["trait"]
+        for gene in (0, 1, 2):
+            genes[person] = gene
+            if mother is None:
+                gene_prop = PROBS["gene"][gene]
+            else:
+                gene_prop = inherited[gene, genes[mother], genes[father]]
+            for has_trait in ((True, False) if trait is None else (trait,)):
+                yield from extend(
+                    depth + 1,
+                    one_gene | (bits[person] if gene == 1 else 0),
+                    two_genes | (bits[person] if gene == 2 else 0),
+                    have_trait | (bits[person] if has_trait else 0),
+                    p * gene_prop * PROBS["trait"][gene][has_trait])
+
+    yield from extend(0, 0, 0, 0, 1)
+
+
+def parents_first(people):
+    """
+    Return the names in `people` ordered so that everyone comes after
+    their parents.
+    """
+    order = []
+    seen = set()
+
+    def visit(person):
+        if person is None or person in seen:
+            return
+        seen.add(person)
+        visit(people[person]["mother"])
+        visit(people[person]["father"])
+        order.append(person)
+
+    for person in people:
+        visit(person)
+    return order
+
+
+def inheritance(gene, mother, father):
+    """
+    Return the probability that a child of parents with `mother` and
+    `father` copies of the gene has `gene` copies.
+    """
+    passes = [
+        PROBS["mutation"] if parent == 0
+        else 0.5 if parent == 1
+        else 1 - PROBS["mutation"]
+        for parent in (mother, father)
+    ]
+    if gene == 0:
+        return (1 - passes[0]) * (1 - passes[1])
+    if gene == 1:
+        return passes[0] * (1 - passes[1]) + (1 - passes[0]) * passes[1]
+    return passes[0] * passes[1]
+
+
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -192,7 +266,25 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
     """
-    raise NotImplementedError
+    for person in probabilities:
+        gene_number = 1 if person in one_gene else 2 if person in two_genes else 0
+        trait = person in have_trait
+
+        probabilities[person]["gene"][gene_number] += p
+        probabilities[person]["trait"][trait] += p
+
+
+def update_masks(probabilities, names, one_gene, two_genes, have_trait, p):
+    """
+    Add to `probabilities` a new joint probability `p`, like `update`,
+    for the bitmasks of `assignments` over the people in `names`.
+    """
+    for i, person in enumerate(names):
+        bit = 1 << i
+        gene_number = 1 if one_gene & bit else 2 if two_genes & bit else 0
+
+        probabilities[person]["gene"][gene_number] += p
+        probabilities[person]["trait"][bool(have_trait & bit)] += p
 
 
 def normalize(probabilities):
@@ -200,7 +292,11 @@ def normalize(probabilities):
     Update `probabilities` such that each probability distribution
     is normalized (i.e., sums to 1, with relative proportions the same).
     """
-    raise NotImplementedError
+    for person in probabilities:
+        for field in probabilities[person]:
+            total = sum(probabilities[person][field].values())
+            for value in probabilities[person][field]:
+                probabilities[person][field][value] /= total
 
 
 if __name__ == "__main__":
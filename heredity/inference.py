@@ -0,0 +1,247 @@
+import heapq
+import itertools
+import sys
+
+from heredity import PROBS, inheritance, load_data, print_probabilities
+
+GENES = (0, 1, 2)
+
+
+def infer(people, clusters=None):
+    """
+    Compute every person's gene and trait distribution exactly, given
+    the traits known in `people`, by message passing on a cluster tree.
+
+    The family is a Bayesian network with one gene variable per person,
+    conditioned on the parents' genes, and a trait observed given the
+    gene. Variables are eliminated one at a time (fewest neighbours
+    first), each elimination forming a cluster, and messages are passed
+    up and then down the resulting tree. For tree-shaped pedigrees no
+    cluster holds more than a person and their parents, so the work is
+    linear in the size of the family.
+
+    `clusters` may be passed in from `cluster_tree` if they have
+    already been built for a family of the same structure.
+
+    Return a dictionary in the form `main` builds, mapping each person
+    to their "gene" and "trait" distributions.
+    """
+    names = list(people)
+    if clusters is None:
+        clusters = cluster_tree(structure(people))
+
+    # Known traits are evidence on the cluster each person is eliminated in
+    factors = []
+    for cluster in clusters:
+        trait = people[names[cluster["person"]]]["trait"]
+        factors.append(cluster["factor"] if trait is None else multiply(
+            cluster["factor"], ((cluster["person"],), {
+                (gene,): PROBS["trait"][gene][trait] for gene in GENES
+            })))
+
+    # Pass messages up the tree in elimination order...
+    up = []
+    for cluster, factor in zip(clusters, factors):
+        up.append(normalized(marginalize(
+            multiply(factor, *(up[child] for child in cluster["children"])),
+            cluster["separator"])))
+
+    # ...and back down, each child getting everything except its own
+    # message, through prefix and suffix products over the children
+    down = [((), {(): 1})] * len(clusters)
+    probabilities = {}
+    for i in reversed(range(len(clusters))):
+        cluster = clusters[i]
+        children = cluster["children"]
+        messages = [up[child] for child in children]
+        prefixes = [multiply(factors[i], down[i])]
+        for message in messages:
+            prefixes.append(multiply(prefixes[-1], message))
+        suffix = ((), {(): 1})
+        for child, message, prefix in zip(
+                reversed(children), reversed(messages), reversed(prefixes[:-1])):
+            down[child] = normalized(marginalize(
+                multiply(prefix, suffix), clusters[child]["separator"]))
+            suffix = multiply(message, suffix)
+
+        person = cluster["person"]
+        genes = normalized(marginalize(prefixes[-1], (person,)))[1]
+        probabilities[names[person]] = distributions(
+            people[names[person]], {gene: genes[(gene,)] for gene in GENES})
+    return {person: probabilities[person] for person in people}
+
+
+def structure(people):
+    """
+    Return who the parents are in `people`, as a tuple with None for
+    each person without parents and (mother, father) positions in
+    `people` for everyone else. Families with the same structure have
+    the same cluster tree.
+    """
+    index = {person: i for i, person in enumerate(people)}
+    return tuple(
+        None if data["mother"] is None
+        else (index[data["mother"]], index[data["father"]])
+        for data in people.values()
+    )
+
+
+def cluster_tree(parents):
+    """
+    Eliminate every person's gene from the factors of a family with
+    the given `structure`, people being numbered by position.
+
+    Return the clusters in elimination order, each a dictionary with
+    the eliminated "person", the product of the family's factors it
+    consumed (over all of the cluster's variables) as "factor", the
+    clusters whose messages it consumed as "children", and the
+    "separator" variables its own message keeps.
+    """
+    people = range(len(parents))
+    factors = family_factors(parents)
+
+    neighbors = {person: set() for person in people}
+    for variables, _ in factors:
+        for person in variables:
+            neighbors[person].update(variables)
+    for person in people:
+        neighbors[person].discard(person)
+
+    # Unconsumed factors (by index) and cluster messages (by negative
+    # index - 1) mentioning each variable
+    holders = {person: set() for person in people}
+    for i, (variables, _) in enumerate(factors):
+        for person in variables:
+            holders[person].add(i)
+
+    clusters = []
+    heap = [(len(neighbors[person]), person) for person in people]
+    heapq.heapify(heap)
+    eliminated = set()
+    while heap:
+        degree, person = heapq.heappop(heap)
+        if person in eliminated or degree != len(neighbors[person]):
+            continue
+        eliminated.add(person)
+
+        items = holders.pop(person)
+        owned = [factors[i] for i in items if i >= 0]
+        children = sorted(-i - 1 for i in items if i < 0)
+        scope = set(neighbors[person]) | {person}
+        for i in items:
+            variables = factors[i][0] if i >= 0 else clusters[-i - 1]["separator"]
+            for variable in variables:
+                if variable != person:
+                    holders[variable].discard(i)
+
+        separator = tuple(sorted(scope - {person}))
+        message = -len(clusters) - 1
+        for variable in separator:
+            holders[variable].add(message)
+        clusters.append({
+            "person": person,
+            "factor": multiply(*owned, variables=(person,) + separator),
+            "children": children,
+            "separator": separator
+        })
+
+        # Connect the remaining neighbours, as their message now joins them
+        for variable in separator:
+            neighbors[variable].discard(person)
+            neighbors[variable].update(v for v in separator if v != variable)
+            heapq.heappush(heap, (len(neighbors[variable]), variable))
+    return clusters
+
+
+def family_factors(parents):
+    """
+    Return the network's factors for each person's gene given their
+    parents (or unconditionally, without parents) as (variables, table)
+    pairs, where `table` maps every tuple of gene counts for `variables`
+    to its probability.
+    """
+    factors = []
+    for person, pair in enumerate(parents):
+        if pair is None:
+            factors.append(((person,), {
+                (gene,): PROBS["gene"][gene] for gene in GENES
+            }))
+        else:
+            factors.append(((person,) + pair, {
+                (gene, mother, father): inheritance(gene, mother, father)
+                for gene, mother, father in itertools.product(GENES, repeat=3)
+            }))
+    return factors
+
+
+def distributions(data, genes):
+    """
+    Return a person's "gene" and "trait" distributions given their
+    gene distribution `genes`.
+    """
+    if data["trait"] is None:
+        trait = sum(genes[gene] * PROBS["trait"][gene][True] for gene in GENES)
+    else:
+        trait = 1 if data["trait"] else 0
+    return {
+        "gene": {gene: genes[gene] for gene in (2, 1, 0)},
+        "trait": {True: trait, False: 1 - trait}
+    }
+
+
+def multiply(*factors, variables=()):
+    """
+    Return the product of `factors` over the union of their variables
+    and any extra `variables`.
+    """
+    variables = tuple(dict.fromkeys(itertools.chain(variables, (
+        variable for scope, _ in factors for variable in scope))))
+    positions = [
+        (tuple(variables.index(variable) for variable in scope), table)
+        for scope, table in factors
+    ]
+    table = {}
+    for values in itertools.product(GENES, repeat=len(variables)):
+        probability = 1
+        for indices, factor in positions:
+            probability *= factor[tuple(values[i] for i in indices)]
+        table[values] = probability
+    return variables, table
+
+
+def marginalize(factor, keep):
+    """
+    Sum `factor` over every variable not in `keep`.
+    """
+    variables, table = factor
+    indices = [variables.index(variable) for variable in keep]
+    result = {}
+    for values, probability in table.items():
+        key = tuple(values[i] for i in indices)
+        result[key] = result.get(key, 0) + probability
+    return tuple(keep), result
+
+
+def normalized(factor):
+    """
+    Scale `factor` to sum to 1, so long pedigrees do not underflow.
+    """
+    variables, table = factor
+    total = sum(table.values())
+    return variables, {values: p / total for values, p in table.items()}
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python inference.py data.csv")
+    people = load_data(sys.argv[1])
+    probabilities = infer(people)
+
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+if __name__ == "__main__":
+    main()
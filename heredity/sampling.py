@@ -0,0 +1,367 @@
+import sys
+import warnings
+from multiprocessing import Pool
+
+import numpy as np
+
+from heredity import load_data, parents_first
+from vectorized import GENE, INHERITED, TRAIT, Family
+
+# Total samples drawn, split over the chains
+SAMPLES = 100000
+CHAINS = 8
+
+# Gibbs walkers moved in lockstep within each chain, and the fraction
+# of each walker's sweeps thrown away before it is counted
+WALKERS = 32
+BURN_IN = 0.2
+
+METHODS = ("gibbs", "weighting")
+
+# Fraction of the samples likelihood weighting must effectively keep
+# before its estimates and errors are trusted without a warning
+MIN_EFFECTIVE = 0.01
+
+LOG_INHERITED = np.log(INHERITED)
+
+
+def sample_probabilities(people, method="gibbs", samples=SAMPLES,
+                         chains=CHAINS, seed=None, workers=None):
+    """
+    Estimate every person's gene and trait distribution by sampling,
+    with `method` either "gibbs" or "weighting" (likelihood weighting).
+
+    `samples` are split over `chains` independent chains, run in a pool
+    of `workers` processes; passing the same `seed` reproduces the same
+    estimates whatever the number of workers. Raises ValueError if
+    there are no chains, or fewer samples than chains.
+
+    Return a tuple (probabilities, errors, diagnostics): `probabilities`
+    in the form `heredity.main` builds, `errors` in the same form with
+    the standard error of each estimate, and a `diagnostics` dictionary
+    with the largest Gelman-Rubin "r_hat" for Gibbs sampling, or the
+    "effective_samples" for likelihood weighting. Likelihood weighting
+    warns with a RuntimeWarning if fewer than `MIN_EFFECTIVE` of its
+    samples effectively count, as on large pedigrees with many known
+    traits; its errors are then wide, and Gibbs sampling does better.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}")
+    if chains < 1:
+        raise ValueError("chains must be at least 1")
+    if samples < chains:
+        raise ValueError(f"need at least one sample per chain, "
+                         f"got {samples} for {chains} chains")
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    tasks = [(people, method, samples // chains, chain_seed)
+             for chain_seed in seeds]
+    with Pool(workers) as pool:
+        results = pool.map(_chain, tasks)
+
+    names = list(people)
+    if method == "gibbs":
+        means = np.concatenate([result["means"] for result in results])
+        squares = np.concatenate([result["squares"] for result in results])
+        estimates = means.mean(axis=0)
+        errors = means.std(axis=0, ddof=1) / np.sqrt(len(means))
+        diagnostics = {
+            "r_hat": r_hat(means, squares, results[0]["sweeps"])
+        }
+    else:
+        logs = np.array([result["log_weight"] for result in results])
+        scale = np.exp(logs - logs.max())
+
+        def pooled(field, power=1):
+            return sum(s ** power * result[field]
+                       for s, result in zip(scale, results))
+
+        total = pooled("weights")
+        squared = pooled("squared_weights", 2)
+        estimates = pooled("sums") / total
+
+        # The weighted mean's variance, sum w^2 (x - estimate)^2 / W^2,
+        # expanded into the sums each chain kept
+        variance = (pooled("squared_squares", 2)
+                    - 2 * estimates * pooled("squared_sums", 2)
+                    + estimates ** 2 * squared) / total ** 2
+
+        # That variance is itself estimated from the weights, and with
+        # heavy-tailed weights it comes out near 0 however wrong the
+        # estimate is. The chains' own estimates disagree by as much as
+        # the estimate is actually off, so their spread bounds the error
+        # from below, over the number of chains that really count
+        if chains > 1:
+            chain_weights = scale * np.array(
+                [result["weights"] for result in results])
+            chain_estimates = np.array(
+                [result["sums"] / result["weights"] for result in results])
+            effective_chains = chain_weights.sum() ** 2 / (
+                chain_weights ** 2).sum()
+            variance = np.maximum(
+                variance,
+                chain_estimates.var(axis=0, ddof=1) / effective_chains)
+
+        # Nor can the chains see values none of them drew, so the error
+        # is never below that of a proportion counted over the effective
+        # samples, with one success and one failure added to each
+        effective = float(total ** 2 / squared)
+        smoothed = (effective * np.clip(estimates, 0, 1) + 1) / (effective + 2)
+        variance = np.maximum(
+            variance, smoothed * (1 - smoothed) / (effective + 2))
+        errors = np.sqrt(variance)
+
+        if effective < MIN_EFFECTIVE * samples:
+            warnings.warn(
+                f"only {effective:.1f} effective samples of {samples}; "
+                f"likelihood weighting has degenerated, so use Gibbs "
+                f"sampling for this family", RuntimeWarning, stacklevel=2)
+        diagnostics = {"effective_samples": effective}
+
+    diagnostics.update(method=method, samples=samples, chains=chains)
+    return (distributions(names, estimates),
+            distributions(names, errors, errors=True), diagnostics)
+
+
+def gibbs_chain(people, sweeps, rng, walkers=WALKERS, burn_in=BURN_IN):
+    """
+    Run `walkers` Gibbs samplers in lockstep for `sweeps` sweeps each.
+
+    Each sweep redraws every person's gene from its distribution given
+    everyone else's, which only involves their parents, children and
+    their children's other parents. The distributions themselves are
+    counted (rather than the genes drawn), as they are less noisy.
+
+    Return a tuple (means, squares, counted) where means[w] is walker
+    w's average estimate of every person's (gene 0, gene 1, gene 2,
+    trait) probabilities over the `counted` sweeps after burn in, and
+    squares[w] its average square.
+    """
+    family = Family(people)
+    n = len(family.names)
+    index = {person: i for i, person in enumerate(family.names)}
+    order = [index[person] for person in parents_first(people)]
+    evidence = np.log(_evidence(people, family))
+    children = [[] for _ in range(n)]
+    for child in range(n):
+        if not family.founders[child]:
+            children[family.mothers[child]].append((child, 0))
+            children[family.fathers[child]].append((child, 1))
+
+    genes = np.zeros((walkers, n), dtype=np.int64)
+    for i in order:
+        genes[:, i] = _draw(rng, _prior(family, genes, i))
+
+    skip = int(sweeps * burn_in)
+    counted = sweeps - skip
+    sums = np.zeros((walkers, n, 4))
+    squares = np.zeros((walkers, n, 4))
+    genotypes = np.arange(3)
+    for sweep in range(sweeps):
+        for i in order:
+            logs = np.log(_prior(family, genes, i)) + evidence[i]
+            for child, side in children[i]:
+                mother = (genotypes if side == 0
+                          else genes[:, family.mothers[child], None])
+                father = (genotypes if side == 1
+                          else genes[:, family.fathers[child], None])
+                logs += LOG_INHERITED[genes[:, child, None], mother, father]
+            weights = np.exp(logs - logs.max(axis=1, keepdims=True))
+            weights /= weights.sum(axis=1, keepdims=True)
+            genes[:, i] = _draw(rng, weights)
+
+            if sweep >= skip:
+                estimate = _estimate(people, family, i, weights)
+                sums[:, i] += estimate
+                squares[:, i] += estimate ** 2
+    return sums / counted, squares / counted, counted
+
+
+def weighting_chain(people, samples, rng, chunk=1 << 14):
+    """
+    Draw `samples` assignments of genes from the model, parents first,
+    each weighted by the probability of the known traits given it.
+
+    Return a dictionary of sums over the samples, with weights w taken
+    relative to exp("log_weight"): the "weights" and "squared_weights",
+    and for every person's (gene 0, gene 1, gene 2, trait) values x,
+    the "sums" of w x, "squared_sums" of w^2 x and "squared_squares"
+    of w^2 x^2, from which `sample_probabilities` estimates errors.
+    """
+    family = Family(people)
+    n = len(family.names)
+    index = {person: i for i, person in enumerate(family.names)}
+    order = [index[person] for person in parents_first(people)]
+    evidence = np.log(_evidence(people, family))
+
+    # Weights are kept relative to the largest log weight seen so far,
+    # and everything summed is rescaled when a larger one turns up
+    log_weight = -np.inf
+    total = squared = 0
+    sums = np.zeros((n, 4))
+    squared_sums = np.zeros((n, 4))
+    squared_squares = np.zeros((n, 4))
+    for start in range(0, samples, chunk):
+        genes = np.zeros((min(chunk, samples - start), n), dtype=np.int64)
+        log_weights = np.zeros(len(genes))
+        for i in order:
+            genes[:, i] = _draw(rng, _prior(family, genes, i))
+            log_weights += evidence[i][genes[:, i]]
+
+        if log_weights.max() > log_weight:
+            rescale = np.exp(log_weight - log_weights.max())
+            total, squared = total * rescale, squared * rescale ** 2
+            sums *= rescale
+            squared_sums *= rescale ** 2
+            squared_squares *= rescale ** 2
+            log_weight = log_weights.max()
+        weights = np.exp(log_weights - log_weight)
+        total += weights.sum()
+        squared += (weights ** 2).sum()
+
+        # Average each person's trait probability given the gene drawn,
+        # rather than drawing the trait too
+        for i in range(n):
+            genotypes = np.bincount(genes[:, i], weights=weights, minlength=3)
+            sums[i] += _estimate(people, family, i, genotypes[None])[0]
+            genotypes = np.bincount(
+                genes[:, i], weights=weights ** 2, minlength=3)
+            squared_sums[i] += _estimate(people, family, i, genotypes[None])[0]
+
+            # Gene values are 0 or 1, so only the trait's square differs
+            squared_squares[i, :3] = squared_sums[i, :3]
+            trait = people[family.names[i]]["trait"]
+            values = TRAIT[:, 1] if trait is None else np.full(3, float(trait))
+            squared_squares[i, 3] += genotypes @ values ** 2
+
+    return {
+        "log_weight": float(log_weight),
+        "weights": float(total),
+        "squared_weights": float(squared),
+        "sums": sums,
+        "squared_sums": squared_sums,
+        "squared_squares": squared_squares
+    }
+
+
+def r_hat(means, squares, counted):
+    """
+    Return the largest Gelman-Rubin statistic over every estimate, from
+    each walker's mean and mean square over `counted` sweeps. Values
+    near 1 mean the walkers agree; above about 1.1 they have not mixed.
+    """
+    within = (squares - means ** 2).mean(axis=0) * (
+        counted / max(counted - 1, 1))
+    between = counted * means.var(axis=0, ddof=1)
+    pooled = (counted - 1) / counted * within + between / counted
+    stable = within > 1e-12
+    if not stable.any():
+        return 1.0
+    return float(np.sqrt(pooled[stable] / within[stable]).max())
+
+
+def distributions(names, estimates, errors=False):
+    """
+    Convert an (n, 4) array of (gene 0, gene 1, gene 2, trait) values
+    into the dictionary form `heredity.main` builds. The error on not
+    having the trait is the same as on having it, so with `errors` it
+    is copied rather than subtracted from 1.
+    """
+    if not errors:
+        estimates = np.clip(estimates, 0, 1)
+    return {
+        person: {
+            "gene": {gene: float(estimates[i, gene]) for gene in (2, 1, 0)},
+            "trait": {
+                True: float(estimates[i, 3]),
+                False: float(
+                    estimates[i, 3] if errors else 1 - estimates[i, 3])
+            }
+        }
+        for i, person in enumerate(names)
+    }
+
+
+def _chain(task):
+    people, method, samples, seed = task
+    rng = np.random.default_rng(seed)
+    if method == "weighting":
+        return weighting_chain(people, samples, rng)
+    sweeps = max(samples // WALKERS, 2)
+    means, squares, counted = gibbs_chain(people, sweeps, rng)
+    return {"means": means, "squares": squares, "sweeps": counted}
+
+
+def _evidence(people, family):
+    """
+    Return an (n, 3) array of the probability of each person's known
+    trait given each gene count, or 1 where the trait is unknown.
+    """
+    evidence = np.ones((len(family.names), 3))
+    for i, person in enumerate(family.names):
+        trait = people[person]["trait"]
+        if trait is not None:
+            evidence[i] = TRAIT[:, int(trait)]
+    return evidence
+
+
+def _prior(family, genes, i):
+    """
+    Return the (walkers, 3) distribution of person i's gene given their
+    parents' genes in each row of `genes`.
+    """
+    if family.founders[i]:
+        return np.broadcast_to(GENE, (len(genes), 3))
+    return INHERITED[:, genes[:, family.mothers[i]],
+                     genes[:, family.fathers[i]]].T
+
+
+def _estimate(people, family, i, weights):
+    """
+    Return person i's (gene 0, gene 1, gene 2, trait) probabilities for
+    each row of gene distributions `weights`, scaled by the row's sum.
+    """
+    trait = people[family.names[i]]["trait"]
+    if trait is None:
+        has_trait = weights @ TRAIT[:, 1]
+    else:
+        has_trait = weights.sum(axis=1) * float(trait)
+    return np.column_stack([weights, has_trait])
+
+
+def _draw(rng, weights):
+    """
+    Draw one gene count for each row of distributions `weights`.
+    """
+    cumulative = np.cumsum(weights, axis=1)
+    draws = rng.random(len(weights)) * cumulative[:, -1]
+    return (draws[:, None] >= cumulative[:, :-1]).sum(axis=1)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in (2, 3, 4, 5):
+        sys.exit("Usage: python sampling.py data.csv [gibbs|weighting] "
+                 "[samples] [seed]")
+    people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) > 2 else "gibbs"
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else SAMPLES
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    probabilities, errors, diagnostics = sample_probabilities(
+        people, method, samples, seed=seed)
+
+    # Print results, with standard errors
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                error = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {error:.4f}")
+    for name, value in diagnostics.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import random
+import sys
+
+from heredity import load_data
+from inference import infer
+from sampling import METHODS, sample_probabilities
+
+FAMILIES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data",
+                 f"family{i}.csv")
+    for i in range(3)
+]
+
+# People in the generated pedigree, which likelihood weighting cannot
+# sample well, to check its errors still cover the exact answer
+GENERATED = 60
+
+# Standard errors an estimate may be off by before it counts as wrong
+TOLERANCE = 4
+
+
+def pedigree(n, seed=0, known=0.5, affected=0.3):
+    """
+    Generate a tree-shaped pedigree of `n` people in the form
+    `heredity.load_data` returns: starting from a couple, someone
+    already in the family repeatedly marries in a new founder and has
+    one to three children with them. Each person's trait is known with
+    probability `known`, and if known is present with probability
+    `affected`.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": (rng.random() < affected
+                      if rng.random() < known else None)
+        }
+        return name
+
+    add()
+    add()
+    while len(people) < n:
+        parent = rng.choice(list(people))
+        spouse = add()
+        for _ in range(rng.randint(1, 3)):
+            if len(people) < n:
+                add(parent, spouse)
+    return people
+
+
+def validate(people, method, samples, seed=0, tolerance=TOLERANCE):
+    """
+    Compare sampled estimates for one family against exact inference.
+
+    Return a list of (person, field, value, estimate, error, exact) for
+    every estimate more than `tolerance` standard errors from exact.
+    """
+    exact = infer(people)
+    estimates, errors, _ = sample_probabilities(
+        people, method, samples, seed=seed)
+
+    failures = []
+    for person in people:
+        for field in exact[person]:
+            for value in exact[person][field]:
+                p = estimates[person][field][value]
+                error = errors[person][field][value]
+                if abs(p - exact[person][field][value]) > (
+                        tolerance * error + 1e-9):
+                    failures.append((person, field, value, p, error,
+                                     exact[person][field][value]))
+    return failures
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python validate.py [samples]")
+    samples = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    families = {
+        os.path.basename(filename): load_data(filename)
+        for filename in FAMILIES
+    }
+    families[f"generated{GENERATED}"] = pedigree(GENERATED)
+
+    failed = False
+    for name, people in families.items():
+        for method in METHODS:
+            failures = validate(people, method, samples)
+            print(f"{name} {method}: "
+                  f"{'ok' if not failures else 'FAILED'}")
+            for person, field, value, p, error, exact in failures:
+                print(f"  {person} {field} {value}: {p:.4f} ± {error:.4f}, "
+                      f"exact {exact:.4f}")
+            failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import sys
+
+import numpy as np
+
+from heredity import PROBS, inheritance, load_data, print_probabilities
+
+# Assignments scored per batch when enumerating a family
+CHUNK = 1 << 18
+
+# GENE[g] is the unconditional probability of g copies, INHERITED[g, m, f]
+# the probability of g copies given parents with m and f copies, and
+# TRAIT[g, t] the probability of trait t (0 or 1) given g copies
+GENE = np.array([PROBS["gene"][gene] for gene in (0, 1, 2)])
+INHERITED = np.array([
+    [[inheritance(gene, mother, father) for father in (0, 1, 2)]
+     for mother in (0, 1, 2)]
+    for gene in (0, 1, 2)
+])
+TRAIT = np.array([
+    [PROBS["trait"][gene][False], PROBS["trait"][gene][True]]
+    for gene in (0, 1, 2)
+])
+
+
+class Family:
+    """
+    The structure of a family as index arrays over the people in
+    `people` order, for scoring many assignments at once.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {person: i for i, person in enumerate(self.names)}
+        self.founders = np.array(
+            [people[person]["mother"] is None for person in self.names])
+        self.mothers = np.array([
+            index.get(people[person]["mother"], 0) for person in self.names])
+        self.fathers = np.array([
+            index.get(people[person]["father"], 0) for person in self.names])
+
+        traits = [people[person]["trait"] for person in self.names]
+        self.known = sum(1 << i for i, trait in enumerate(traits) if trait)
+        self.unknown = np.array(
+            [i for i, trait in enumerate(traits) if trait is None],
+            dtype=np.int64)
+
+    def joint_probability(self, genes, have_trait):
+        """
+        Compute the joint probability of a batch of assignments, like
+        `heredity.joint_probability` for each.
+
+        `genes` is a (k, n) array of gene counts, row j giving every
+        person's copies in assignment j, and `have_trait` a length-k
+        array of bitmasks whose bit i is set if person i has the trait.
+        Return a length-k array of probabilities.
+        """
+        n = len(self.names)
+        traits = (have_trait[:, None] >> np.arange(n)) & 1
+        inherited = INHERITED[
+            genes, genes[:, self.mothers], genes[:, self.fathers]]
+        factors = np.where(self.founders, GENE[genes], inherited)
+        return (factors * TRAIT[genes, traits]).prod(axis=1)
+
+    def assignments(self, start, stop):
+        """
+        Decode assignments `start` to `stop` of the family's enumeration
+        into (genes, have_trait) arrays for `joint_probability`.
+
+        Assignments are numbered with the unknown traits in the low
+        bits and every person's gene count as base-3 digits above them;
+        known traits are fixed, so only consistent assignments occur.
+        """
+        n = len(self.names)
+        codes = np.arange(start, stop, dtype=np.int64)
+        trait_codes = codes & ((1 << len(self.unknown)) - 1)
+        gene_codes = codes >> len(self.unknown)
+
+        genes = (gene_codes[:, None] // 3 ** np.arange(n)) % 3
+        bits = (trait_codes[:, None] >> np.arange(len(self.unknown))) & 1
+        have_trait = self.known | (bits << self.unknown).sum(axis=1)
+        return genes, have_trait
+
+    def size(self):
+        """
+        Return the number of assignments consistent with known traits.
+        """
+        return 3 ** len(self.names) << len(self.unknown)
+
+
+def batch_probabilities(people, chunk=CHUNK):
+    """
+    Compute every person's gene and trait distribution by scoring all
+    assignments consistent with known traits, `chunk` at a time.
+
+    Return a dictionary in the form `heredity.main` builds.
+    """
+    family = Family(people)
+    n = len(family.names)
+    genes_total = np.zeros((n, 3))
+    traits_total = np.zeros(n)
+    total = 0
+    for start in range(0, family.size(), chunk):
+        genes, have_trait = family.assignments(
+            start, min(start + chunk, family.size()))
+        p = family.joint_probability(genes, have_trait)
+
+        # Sum p over the assignments giving each person each gene count,
+        # and over those where they have the trait
+        for gene in (0, 1, 2):
+            genes_total[:, gene] += p @ (genes == gene)
+        traits_total += p @ ((have_trait[:, None] >> np.arange(n)) & 1)
+        total += p.sum()
+
+    genes_total /= total
+    traits_total = np.clip(traits_total / total, 0, 1)
+    return {
+        person: {
+            "gene": {gene: float(genes_total[i, gene]) for gene in (2, 1, 0)},
+            "trait": {
+                True: float(traits_total[i]),
+                False: float(1 - traits_total[i])
+            }
+        }
+        for i, person in enumerate(family.names)
+    }
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python vectorized.py data.csv")
+    people = load_data(sys.argv[1])
+    probabilities = batch_probabilities(people)
+
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import engine
+import outofcore
+import sharded
+from edgelist import EDGE, write_pages
+from pagerank import (DAMPING, SAMPLES, crawl, iterate_pagerank,
+                      sample_pagerank)
+
+SIZES = (1000, 10000, 100000, 1000000, 10000000)
+
+# Largest corpus the pure-Python engines are run on; they are quadratic
+# or per-sample and would not finish on larger graphs
+LIMITS = {
+    "crawl": 10000,
+    "sample_pagerank": 10000,
+    "iterate_pagerank": 2000
+}
+
+MEAN_LINKS = 8
+DANGLING = 0.1
+SELF_LINKS = 0.01
+
+
+def synthetic_graph(n, seed=0, mean_links=MEAN_LINKS, dangling=DANGLING,
+                    self_links=SELF_LINKS):
+    """
+    Generate a web-like link graph on `n` pages.
+
+    Link targets follow a power law over a random ranking of pages, a
+    `dangling` fraction of pages has no links, and a `self_links`
+    fraction of links point back at their own page.
+
+    Return a tuple (sources, targets) of link arrays, sorted by source
+    and then target, with duplicate links removed. Self-links are kept,
+    as they appear in the HTML.
+    """
+    rng = np.random.default_rng(seed)
+    degrees = rng.geometric(1 / mean_links, size=n)
+    degrees[rng.random(n) < dangling] = 0
+    sources = np.repeat(np.arange(n, dtype=np.int64), degrees)
+
+    ranking = rng.permutation(n)
+    targets = ranking[(rng.zipf(1.8, size=len(sources)) - 1) % n]
+    loops = rng.random(len(sources)) < self_links
+    targets[loops] = sources[loops]
+
+    keys = np.unique(sources * n + targets)
+    return keys // n, keys % n
+
+
+def link_arrays(n, sources, targets):
+    """
+    Convert a synthetic graph to the CSR arrays of `engine.link_arrays`,
+    dropping self-links as `crawl` does.
+    """
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    return offsets, targets
+
+
+def write_html(directory, n, sources, targets):
+    """
+    Write a synthetic graph as a directory of HTML pages.
+    """
+    offsets = np.searchsorted(sources, np.arange(n + 1))
+    for page in range(n):
+        links = "".join(
+            f'            <li><a href="{target}.html">{target}</a></li>\n'
+            for target in targets[offsets[page]:offsets[page + 1]])
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write(f"<html>\n    <body>\n        <ul>\n{links}"
+                    "        </ul>\n    </body>\n</html>\n")
+
+
+def write_edges(prefix, n, offsets, targets):
+    """
+    Write CSR link arrays as an edge list at `prefix`.
+    """
+    write_pages(prefix, (f"{page}.html" for page in range(n)))
+    edges = np.empty((len(targets), 2), dtype=EDGE)
+    edges[:, 0] = np.repeat(np.arange(n), np.diff(offsets))
+    edges[:, 1] = targets
+    edges.tofile(f"{prefix}.edges")
+
+
+def measure(function, *args):
+    """
+    Return a tuple (result, seconds, peak bytes allocated) for a call.
+
+    The call is timed on its own, then run again under tracemalloc for
+    its memory peak, as tracing slows pure-Python code several times
+    more than it slows NumPy.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark(n, directory, seed=0):
+    """
+    Time every engine allowed at size `n` on one synthetic graph.
+
+    Return a list of result dicts, one per engine, each with its time,
+    peak memory and largest rank difference from `matrix_pagerank`.
+    """
+    sources, targets = synthetic_graph(n, seed)
+    offsets, links = link_arrays(n, sources, targets)
+    names = [f"{page}.html" for page in range(n)]
+
+    corpus = None
+    if n <= max(LIMITS["crawl"], LIMITS["sample_pagerank"]):
+        corpus = {
+            names[page]: {
+                names[target]
+                for target in links[offsets[page]:offsets[page + 1]]
+            }
+            for page in range(n)
+        }
+
+    runs = {}
+    matrix, dangling = engine.edge_matrix(offsets, links)
+    runs["matrix_pagerank"] = lambda: engine.power_iteration(
+        matrix, dangling, DAMPING)[0]
+    runs["sharded_pagerank"] = lambda: sharded.sharded_iteration(
+        matrix, dangling, DAMPING)[0]
+    runs["surfer_pagerank"] = lambda: engine.surfer_counts(
+        offsets, links, DAMPING, 10 * n, min(n, 100000), seed) / (10 * n)
+
+    prefix = os.path.join(directory, f"graph{n}")
+    write_edges(prefix, n, offsets, links)
+    runs["edge_list_pagerank"] = lambda: outofcore.stream_ranks(
+        prefix, n, DAMPING)[0]
+
+    if corpus is not None:
+        if n <= LIMITS["crawl"]:
+            html = os.path.join(directory, f"html{n}")
+            os.mkdir(html)
+            write_html(html, n, sources, targets)
+            runs["crawl"] = lambda: crawl(html)
+        if n <= LIMITS["sample_pagerank"]:
+            runs["sample_pagerank"] = lambda: _vector(
+                sample_pagerank(corpus, DAMPING, SAMPLES), names)
+        if n <= LIMITS["iterate_pagerank"]:
+            runs["iterate_pagerank"] = lambda: _vector(
+                iterate_pagerank(corpus, DAMPING), names)
+
+    results = []
+    reference = None
+    for name, run in runs.items():
+        output, seconds, peak = measure(run)
+        result = {
+            "engine": name,
+            "pages": n,
+            "links": int(len(links)),
+            "seconds": round(seconds, 6),
+            "peak_bytes": peak
+        }
+        if name == "crawl":
+            result["matches_graph"] = output == corpus
+        else:
+            if reference is None:
+                reference = output
+            result["max_rank_difference"] = float(
+                np.abs(output - reference).max())
+        results.append(result)
+        print(f"  {n} pages, {name}: {seconds:.3f}s, "
+              f"{peak / 2 ** 20:.1f} MiB peak", file=sys.stderr)
+    return results
+
+
+def _vector(ranks, names):
+    return np.array([ranks[name] for name in names])
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py output.json [pages ...]")
+    sizes = [int(size) for size in sys.argv[2:]] or SIZES
+    random.seed(0)
+
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            results.extend(benchmark(n, directory))
+
+    with open(sys.argv[1], "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processors": os.cpu_count(),
+            "damping": DAMPING,
+            "results": results
+        }, f, indent=2)
+    print(f"Results written to {sys.argv[1]}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
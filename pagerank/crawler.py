@@ -0,0 +1,86 @@
+import os
+import re
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+from edgelist import EDGE, write_pages
+
+# Bytes read from a file at a time, and the longest tag we expect to
+# straddle two reads
+CHUNK_SIZE = 1 << 16
+MAX_TAG = 1 << 12
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of links in the HTML file at `path`, reading it
+    `chunk_size` bytes at a time rather than all at once.
+    """
+    links = set()
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = carry + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1).decode("utf-8", "replace"))
+                end = match.end()
+            if not chunk:
+                return links
+
+            # Keep the tail that might hold the start of a split tag
+            carry = buffer[max(end, len(buffer) - MAX_TAG):]
+
+
+def parallel_crawl(directory, prefix, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Parse a directory of HTML pages in a process pool and write its link
+    graph straight to the edge list at `prefix`.
+
+    Like `crawl`, only links to other pages in the corpus are kept.
+    Return a tuple (number of pages, number of links).
+    """
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html"))
+    index = {page: i for i, page in enumerate(pages)}
+    write_pages(prefix, pages)
+
+    paths = [(os.path.join(directory, page), chunk_size) for page in pages]
+    count = 0
+    with Pool(workers) as pool, open(f"{prefix}.edges", "wb") as f:
+
+        # Results come back in page order, so edges are written sorted
+        results = pool.imap(_extract, paths, chunksize=64)
+        for source, links in enumerate(results):
+            targets = sorted(
+                index[link] for link in links
+                if link in index and index[link] != source)
+            edges = np.empty((len(targets), 2), dtype=EDGE)
+            edges[:, 0] = source
+            edges[:, 1] = targets
+            f.write(edges.tobytes())
+            count += len(targets)
+    return len(pages), count
+
+
+def _extract(task):
+    return extract_links(*task)
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python crawler.py corpus output [workers]")
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    pages, links = parallel_crawl(sys.argv[1], sys.argv[2], workers)
+    print(f"Wrote {pages} pages and {links} links to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+# An edge list is stored as two files sharing a prefix:
+#   <prefix>.pages  page names, one per line, line i naming page i
+#   <prefix>.edges  little-endian int32 (source, target) pairs,
+#                   sorted by source and then target
+EDGE = np.dtype("<i4")
+
+
+def write_pages(prefix, pages):
+    with open(f"{prefix}.pages", "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+
+def read_pages(prefix):
+    with open(f"{prefix}.pages", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f]
+
+
+def open_edges(prefix):
+    """
+    Memory-map the edges of an edge list as an (m, 2) array.
+
+    A corpus without links has an empty file, which cannot be mapped,
+    so it gets an empty (0, 2) array instead.
+    """
+    path = f"{prefix}.edges"
+    if os.path.getsize(path) == 0:
+        return np.empty((0, 2), dtype=EDGE)
+    edges = np.memmap(path, dtype=EDGE, mode="r")
+    return edges.reshape(-1, 2)
+
+
+def write_edge_list(prefix, corpus):
+    """
+    Write a corpus from `crawl` as an edge list, with pages in sorted order.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    write_pages(prefix, pages)
+    with open(f"{prefix}.edges", "wb") as f:
+        for page in pages:
+            targets = sorted(index[link] for link in corpus[page])
+            edges = np.empty((len(targets), 2), dtype=EDGE)
+            edges[:, 0] = index[page]
+            edges[:, 1] = targets
+            f.write(edges.tobytes())
+
+
+def read_corpus(prefix):
+    """
+    Load an edge list back into a corpus dict, as returned by `crawl`.
+    """
+    pages = read_pages(prefix)
+    corpus = {page: set() for page in pages}
+    for source, target in open_edges(prefix):
+        corpus[pages[source]].add(pages[target])
+    return corpus
@@ -0,0 +1,177 @@
+import sys
+
+import numpy as np
+from scipy import sparse
+
+from pagerank import DAMPING, SAMPLES, crawl
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+SURFERS = 1000
+
+# Steps each surfer takes before its visits are counted. The surfer's
+# distribution approaches PageRank by a factor of the damping factor
+# per step, so after 50 steps at 0.85 it is within about 3e-4; without
+# this, surfers starting uniformly over-count low-ranked pages.
+BURN_IN = 50
+
+
+def transition_matrix(corpus):
+    """
+    Build the link structure of `corpus` once, as sparse matrices.
+
+    Return a tuple (pages, matrix, dangling) where `pages` is a sorted
+    list of page names, `matrix` is a CSR matrix with
+    matrix[j, i] = 1 / (number of links on page i) when page i links to
+    page j, and `dangling` is a boolean array marking pages with no links.
+    """
+    pages, offsets, targets = link_arrays(corpus)
+    matrix, dangling = edge_matrix(offsets, targets)
+    return pages, matrix, dangling
+
+
+def edge_matrix(offsets, targets):
+    """
+    Build the transition matrix and dangling mask of `transition_matrix`
+    from CSR link arrays as returned by `link_arrays`.
+    """
+    n = len(offsets) - 1
+    degrees = np.diff(offsets)
+    sources = np.repeat(np.arange(n), degrees)
+    matrix = sparse.csr_matrix(
+        (1 / degrees[sources], (targets, sources)), shape=(n, n))
+    return matrix, degrees == 0
+
+
+def link_arrays(corpus):
+    """
+    Build the links of `corpus` once, as CSR arrays.
+
+    Return a tuple (pages, offsets, targets) where `pages` is a sorted
+    list of page names and the pages linked to by page i are
+    targets[offsets[i]:offsets[i + 1]].
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    targets = []
+    for i, page in enumerate(pages):
+        targets.extend(sorted(index[link] for link in corpus[page]))
+        offsets[i + 1] = len(targets)
+    return pages, offsets, np.array(targets, dtype=np.int64)
+
+
+def power_iteration(matrix, dangling, damping_factor,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    ranks=None):
+    """
+    Run power iteration on a matrix from `transition_matrix`.
+
+    Pages with no links are treated as linking to every page, which is
+    applied as a rank-one correction rather than stored in the matrix.
+    Stops once no rank changes by more than `tolerance`, or after
+    `max_iterations`. Starts from `ranks` if given, else from 1 / N.
+
+    Return a tuple (ranks, iterations).
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n) if ranks is None else np.asarray(ranks, float)
+    teleport = (1 - damping_factor) / n
+
+    for iteration in range(1, max_iterations + 1):
+        dangling_rank = ranks[dangling].sum() / n
+        new_ranks = damping_factor * (matrix @ ranks + dangling_rank) + teleport
+        difference = np.abs(new_ranks - ranks).max()
+        ranks = new_ranks
+        if difference < tolerance:
+            break
+    return ranks, iteration
+
+
+def matrix_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page by sparse power iteration.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    ranks, _ = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def surfer_pagerank(corpus, damping_factor, n, surfers=SURFERS, seed=None):
+    """
+    Return PageRank values for each page by sampling `n` pages in total
+    from `surfers` independent random surfers moving in lockstep.
+
+    Each surfer starts on a random page and walks BURN_IN steps before
+    its pages are counted. At each step, with probability
+    `damping_factor` it follows a random link from its page, and
+    otherwise (or if the page has no links) jumps to a random page.
+    Passing the same `seed` reproduces the same result.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, offsets, targets = link_arrays(corpus)
+    counts = surfer_counts(offsets, targets, damping_factor, n, surfers, seed)
+    return dict(zip(pages, (counts / n).tolist()))
+
+
+def surfer_counts(offsets, targets, damping_factor, n, surfers=SURFERS,
+                  seed=None, burn_in=BURN_IN):
+    """
+    Return how often each page is visited in `n` samples by the surfers
+    of `surfer_pagerank`, over CSR link arrays from `link_arrays`.
+    """
+    rng = np.random.default_rng(seed)
+    degrees = np.diff(offsets)
+    pages = len(degrees)
+    surfers = min(surfers, n)
+    steps = -(-n // surfers)
+
+    counts = np.zeros(pages, dtype=np.int64)
+    current = rng.integers(pages, size=surfers)
+    for step in range(-burn_in, steps):
+        # The last step only counts as many surfers as samples remain
+        if step >= 0:
+            taken = current[:n - step * surfers]
+            counts += np.bincount(taken, minlength=pages)
+
+        # Links are chosen uniformly, so a link is one multiply and
+        # one lookup into the CSR arrays
+        degree = degrees[current]
+        follow = (rng.random(surfers) < damping_factor) & (degree > 0)
+        choice = offsets[current] + (rng.random(surfers) * degree).astype(
+            np.int64)
+        jump = rng.integers(pages, size=surfers)
+        current = jump
+        if len(targets):
+            current = np.where(
+                follow, targets[np.minimum(choice, len(targets) - 1)], jump)
+    return counts
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python engine.py corpus")
+    corpus = crawl(sys.argv[1])
+
+    ranks = surfer_pagerank(corpus, DAMPING, SAMPLES)
+    print(f"PageRank Results from Parallel Sampling (n = {SAMPLES})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+    ranks = matrix_pagerank(corpus, DAMPING)
+    print("PageRank Results from Sparse Power Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+
+import numpy as np
+
+from edgelist import open_edges, read_pages
+from engine import MAX_ITERATIONS, TOLERANCE
+from pagerank import DAMPING
+
+# Edges read from the memory-mapped edge list at a time
+CHUNK_EDGES = 1 << 20
+
+
+def stream_ranks(prefix, n, damping_factor, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS, chunk_edges=CHUNK_EDGES):
+    """
+    Run PageRank over the `n`-page edge list at `prefix`, streaming its
+    memory-mapped edges once per iteration in chunks of `chunk_edges`.
+
+    Only the rank vectors and out-degrees are held in memory.
+    Return a tuple (ranks, iterations).
+    """
+    edges = open_edges(prefix)
+    degrees = np.zeros(n, dtype=np.int64)
+    for start in range(0, len(edges), chunk_edges):
+        chunk = edges[start:start + chunk_edges]
+        degrees += np.bincount(chunk[:, 0], minlength=n)
+    dangling = degrees == 0
+    shares = np.where(dangling, 0, 1 / np.maximum(degrees, 1))
+
+    ranks = np.full(n, 1 / n)
+    teleport = (1 - damping_factor) / n
+    for iteration in range(1, max_iterations + 1):
+        weights = ranks * shares
+        new_ranks = np.zeros(n)
+        for start in range(0, len(edges), chunk_edges):
+            chunk = edges[start:start + chunk_edges]
+            new_ranks += np.bincount(
+                chunk[:, 1], weights=weights[chunk[:, 0]], minlength=n)
+        new_ranks = damping_factor * (
+            new_ranks + ranks[dangling].sum() / n) + teleport
+
+        difference = np.abs(new_ranks - ranks).max()
+        ranks = new_ranks
+        if difference < tolerance:
+            break
+    return ranks, iteration
+
+
+def edge_list_pagerank(prefix, damping_factor, tolerance=TOLERANCE,
+                       max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page of the edge list at `prefix`.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages = read_pages(prefix)
+    ranks, _ = stream_ranks(
+        prefix, len(pages), damping_factor, tolerance, max_iterations)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python outofcore.py edgelist")
+
+    ranks = edge_list_pagerank(sys.argv[1], DAMPING)
+    print("PageRank Results from Edge List")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 # https://cs50.harvard.edu/ai/2020/projects/2/pagerank/
 
+import hashlib
+import json
 import os
 import random
 import re
@@ -7,13 +9,14 @@ import sys
 
 DAMPING = 0.85           # decides the amt of prob. to split for the linked pages
 SAMPLES = 10000
+CACHE = ".pagerank-cache.json"   # link graph and ranks from the last run, kept in the corpus
 # corpus : a dict. which maps page_name to the set of all links that points to that page.
 
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
         
-    corpus = crawl(sys.argv[1])      # return a dictionary of those page_ranks
+    corpus, previous = cached_crawl(sys.argv[1])      # only re-parses pages that changed
 
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)       # Samples : cluster of all html pages     || *need to give the same output dict.
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
@@ -21,7 +24,8 @@ def main():
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
-    ranks = iterate_pagerank(corpus, DAMPING)    #Ctrl + hover
+    ranks = iterate_pagerank(corpus, DAMPING, previous)    # warm start from the last run
+    save_ranks(sys.argv[1], ranks)
     print(f"PageRank Results from Iteration")
 
     for page in sorted(ranks):
@@ -42,8 +46,7 @@ def crawl(directory):
             continue
         with open(os.path.join(directory, filename)) as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+            pages[filename] = parse_links(contents) - {filename}
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -54,40 +57,139 @@ def crawl(directory):
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+def parse_links(contents):
     """
-    Return a probability distribution over which page to visit next,
-    given a current page.
+    Return the set of links in the HTML text `contents`.
+    """
+    return set(re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents))
 
-    With probability `damping_factor`, choose a link at random
-    linked to by `page`. With probability `1 - damping_factor`, choose
-    a link at random chosen from all pages in the corpus.
+
+def cached_crawl(directory):
     """
-    prop_dist = {}          # which all the 
+    Like `crawl`, but keep the links of every page in a cache file in
+    `directory`, keyed by the file's mtime, size and content hash, so
+    only new or changed pages are parsed again.
+
+    Return a tuple (corpus, ranks) where `ranks` are the PageRank values
+    saved by the last run, or None.
+    """
+    path = os.path.join(directory, CACHE)
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {"files": {}, "ranks": None}
+
+    files = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith(".html"):
+            continue
+        stat = os.stat(os.path.join(directory, filename))
+        entry = cache["files"].get(filename)
+        if entry and [entry["mtime"], entry["size"]] == [stat.st_mtime_ns, stat.st_size]:
+            files[filename] = entry      # untouched since the last run
+            continue
+
+        with open(os.path.join(directory, filename), "rb") as f:
+            contents = f.read()
+        digest = hashlib.sha256(contents).hexdigest()
+        if not entry or entry["hash"] != digest:
+            links = sorted(parse_links(contents.decode()) - {filename})
+        else:
+            links = entry["links"]       # touched but not changed
+        files[filename] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": digest,
+            "links": links
+        }
+
+    cache["files"] = files
+    try:
+        with open(path, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass      # read-only corpus, so just run without the cache
+
+    # Only include links to other pages in the corpus
+    corpus = {
+        filename: set(link for link in files[filename]["links"] if link in files)
+        for filename in files
+    }
+    return corpus, cache.get("ranks")
 
-    # check if page has outgoing links : which links other pages
-    dict_len = len(corpus.keys())
-    pages_len = len(corpus[page])
 
-    if len(corpus[page]) < 1:
-        # no. outgoing pages, choosing randomly from all possible pages
-        for key in corpus.keys():
-            prop_dist[key] = 1 / dict_len
+def save_ranks(directory, ranks):
+    """
+    Store `ranks` in the cache file of `directory` so the next run can
+    warm-start from them. Nothing is stored if the file can't be written.
+    """
+    path = os.path.join(directory, CACHE)
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {"files": {}}
+    cache["ranks"] = ranks
+    try:
+        with open(path, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass      # read-only corpus, nowhere to keep them
+
+
+class TransitionModel():
+    """
+    Transition model of a corpus for one damping factor, built once so
+    that each step only costs the out-degree of the current page.
+    """
 
-    else:
-        # If there are outgoing pages => calculating distribution//prop.
-        random_factor = (1 - damping_factor) / dict_len          # 0.15 / no. of links\\pages
-        even_factor = damping_factor / pages_len             # 0.85 / no. of pages
+    def __init__(self, corpus, damping_factor):
+        self.pages = list(corpus.keys())
+        self.links = {page: list(corpus[page]) for page in corpus}   # lists, so sampling is O(1)
+        self.damping_factor = damping_factor
+        self.random_factor = (1 - damping_factor) / len(self.pages)  # 0.15 / no. of pages
+
+    def distribution(self, page):
+        """
+        Return a sparse distribution over which page to visit next, as a
+        tuple (base, extra): every page has probability `base`, plus
+        `extra[link]` for each link on `page`.
+        """
+        links = self.links[page]
+        if not links:
+            # no outgoing pages, every page is equally likely
+            return 1 / len(self.pages), {}
+        even_factor = self.damping_factor / len(links)             # 0.85 / no. of links
+        return self.random_factor, {link: even_factor for link in links}
+
+    def probabilities(self, page):
+        """
+        Return the full distribution, as a dict over every page.
+        """
+        base, extra = self.distribution(page)
+        return {key: base + extra.get(key, 0) for key in self.pages}
+
+    def sample(self, page):
+        """
+        Return the next page, drawn from the distribution for `page`.
+        """
+        links = self.links[page]
+        if links and random.random() < self.damping_factor:
+            return random.choice(links)      # follow a link
+        return random.choice(self.pages)     # jump anywhere (also covers pages with no links)
 
-        for key in corpus.keys():
-            if key not in corpus[page]:         # if the page is not found
-                prop_dist[key] = random_factor    # putting some page in place of that
-            else:
-                prop_dist[key] = even_factor + random_factor          # this just going to give a prob.(decimal) ???
 
-    return prop_dist
+def transition_model(corpus, page, damping_factor):
+    """
+    Return a probability distribution over which page to visit next,
+    given a current page.
 
-    #raise NotImplementedError
+    With probability `damping_factor`, choose a link at random
+    linked to by `page`. With probability `1 - damping_factor`, choose
+    a link at random chosen from all pages in the corpus.
+    """
+    return TransitionModel(corpus, damping_factor).probabilities(page)
 
 
 def sample_pagerank(corpus, damping_factor, n):
@@ -103,23 +205,21 @@ def sample_pagerank(corpus, damping_factor, n):
     # prepare a dict with len equal to sample but values are all zero.
     sample_dict = corpus.copy()
     for i in sample_dict:
-        sample_dict[i] == 0
+        sample_dict[i] = 0
 
     sample = None        # Cluster of htmls  
+    model = TransitionModel(corpus, damping_factor)      # built once, not on every step
 
     # itearting n times
     for _ in range(n):
         if sample:
             # previous sample is available, choosing using transition model
-            dist = transition_model(corpus, sample, damping_factor)           
-            dist_lst = list(dist.keys())              # we remove keys(aka pages) from dict 
-            dist_weights = [dist[i] for i in dist]       # we remove values(aka links) from dict   
-            sample = random.choices(dist_lst, dist_weights, k=1)[0]
+            sample = model.sample(sample)
             # the prop. of choosing each page and with that link, is also baised(weights)
 
         else:
             # no previous sample, choosing randomly
-            sample = random.choice(list(corpus.keys()))       # its a list of page_name.
+            sample = random.choice(model.pages)       # its a list of page_name.
 
         # count each sample   ??
         sample_dict[sample] += 1
@@ -133,11 +233,15 @@ def sample_pagerank(corpus, damping_factor, n):
     #raise NotImplementedError
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, ranks=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    If `ranks` from an earlier run are given, start from them instead
+    of 1/n, which after small edits to the corpus converges in far
+    fewer iterations.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
@@ -150,6 +254,14 @@ def iterate_pagerank(corpus, damping_factor):
     for page in corpus:              # Just giving intial prob. to pages
         old_dict[page] = 1 / pages_number
 
+    if ranks:
+        # warm start: previous ranks, new pages get 1/n, then rescale to sum to 1
+        for page in corpus:
+            old_dict[page] = ranks.get(page, 1 / pages_number)
+        total = sum(old_dict.values())
+        for page in old_dict:
+            old_dict[page] /= total
+
     # repeatedly calculating new rank values basing on all of the current rank values
     while True:
         for page in corpus:
@@ -0,0 +1,112 @@
+import sys
+from collections import deque
+
+import numpy as np
+
+from engine import MAX_ITERATIONS, TOLERANCE, transition_matrix
+from pagerank import DAMPING, crawl
+
+# Residual per link below which local push stops spreading rank
+EPSILON = 1e-6
+
+
+def personalized_pagerank(corpus, damping_factor, teleport,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page, where the random surfer jumps
+    according to `teleport`, a dictionary of page weights, instead of
+    uniformly over the corpus.
+    """
+    return batch_personalized_pagerank(
+        corpus, damping_factor, [teleport], tolerance, max_iterations)[0]
+
+
+def batch_personalized_pagerank(corpus, damping_factor, teleports,
+                                tolerance=TOLERANCE,
+                                max_iterations=MAX_ITERATIONS):
+    """
+    Solve personalized PageRank for every teleport distribution in
+    `teleports` at once, iterating on an N x k block of rank vectors.
+
+    Each teleport is a dictionary of page weights, normalized to sum
+    to 1. Pages with no links jump according to the same distribution.
+    Return a list with one {page: rank} dictionary per teleport.
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    jumps = np.zeros((len(pages), len(teleports)))
+    for column, teleport in enumerate(teleports):
+        for page, weight in teleport.items():
+            jumps[index[page], column] = weight
+        total = jumps[:, column].sum()
+        if total <= 0:
+            raise ValueError("teleport weights must sum to more than 0")
+        jumps[:, column] /= total
+
+    ranks = jumps.copy()
+    for _ in range(max_iterations):
+        dangling_rank = ranks[dangling].sum(axis=0)
+        new_ranks = damping_factor * (
+            matrix @ ranks + jumps * dangling_rank
+        ) + (1 - damping_factor) * jumps
+        difference = np.abs(new_ranks - ranks).max()
+        ranks = new_ranks
+        if difference < tolerance:
+            break
+
+    return [
+        dict(zip(pages, ranks[:, column].tolist()))
+        for column in range(len(teleports))
+    ]
+
+
+def local_pagerank(corpus, damping_factor, seed, epsilon=EPSILON):
+    """
+    Approximate personalized PageRank for a single `seed` page by local
+    push, touching only pages near the seed.
+
+    Rank is pushed out from pages holding more than `epsilon` residual
+    per link, so the error on each page is at most about `epsilon`
+    times its number of links. Pages with no links jump back to the
+    seed. Return a dictionary of ranks for the pages reached; all
+    other pages have (approximately) no rank.
+    """
+    ranks = {}
+    residual = {seed: 1.0}
+    queue = deque([seed])
+    while queue:
+        page = queue.popleft()
+        mass = residual.get(page, 0)
+        links = corpus[page]
+        if mass <= epsilon * max(len(links), 1):
+            continue
+        residual[page] = 0
+        ranks[page] = ranks.get(page, 0) + (1 - damping_factor) * mass
+
+        # Spread the rest over the page's links, or back to the seed
+        targets = links or {seed}
+        share = damping_factor * mass / len(targets)
+        for target in targets:
+            residual[target] = residual.get(target, 0) + share
+            if residual[target] > epsilon * max(len(corpus[target]), 1):
+                queue.append(target)
+    return ranks
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python personalized.py corpus page [page ...]")
+    corpus = crawl(sys.argv[1])
+    seeds = sys.argv[2:]
+
+    results = batch_personalized_pagerank(
+        corpus, DAMPING, [{seed: 1} for seed in seeds])
+    for seed, ranks in zip(seeds, results):
+        print(f"PageRank Results Personalized to {seed}")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import sys
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from engine import MAX_ITERATIONS, TOLERANCE, transition_matrix
+from pagerank import DAMPING, crawl
+
+# Shards handed out per worker, so a slow shard does not hold up the rest
+SHARDS_PER_WORKER = 4
+
+# The shared arrays and cached shard matrices of each worker process
+shared = {}
+shards = {}
+
+
+def sharded_pagerank(corpus, damping_factor, workers=None,
+                     tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page, splitting every iteration
+    over `workers` processes.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    ranks, _ = sharded_iteration(
+        matrix, dangling, damping_factor, workers, tolerance, max_iterations)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def sharded_iteration(matrix, dangling, damping_factor, workers=None,
+                      tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Run `power_iteration` with its pages split into shards of rows of
+    `matrix`, each updated by a worker process.
+
+    The matrix and two rank vectors live in shared memory: in each
+    iteration every shard reads the current ranks and writes its own
+    slice of the next ones, and the iteration ends once all shards are
+    done. Rows are computed exactly as in `power_iteration`, so the
+    result is the same.
+
+    Return a tuple (ranks, iterations).
+    """
+    n = matrix.shape[0]
+    workers = workers or os.cpu_count()
+    bounds = shard_bounds(matrix, workers * SHARDS_PER_WORKER)
+
+    blocks = {}
+    try:
+        arrays = {
+            "data": matrix.data,
+            "indices": matrix.indices,
+            "indptr": matrix.indptr,
+            "ranks": np.full((2, n), 1 / n)
+        }
+        layout = {}
+        for name, array in arrays.items():
+            blocks[name] = shared_memory.SharedMemory(
+                create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, array.dtype, blocks[name].buf)
+            view[...] = array
+            layout[name] = (blocks[name].name, array.shape, array.dtype.str)
+        ranks = np.ndarray((2, n), float, blocks["ranks"].buf)
+
+        with Pool(workers, initializer=init, initargs=(layout, n)) as pool:
+            current = 0
+            for iteration in range(1, max_iterations + 1):
+                dangling_rank = ranks[current][dangling].sum() / n
+                tasks = [(start, stop, current, damping_factor, dangling_rank)
+                         for start, stop in bounds]
+                difference = max(pool.map(sweep, tasks), default=0)
+                current = 1 - current
+                if difference < tolerance:
+                    break
+        result = ranks[current].copy()
+        del ranks
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    return result, iteration
+
+
+def shard_bounds(matrix, count):
+    """
+    Split the rows of `matrix` into at most `count` contiguous shards
+    with about the same number of links each.
+
+    Return a list of (start, stop) row ranges.
+    """
+    n = matrix.shape[0]
+    cuts = np.searchsorted(
+        matrix.indptr, np.linspace(0, matrix.nnz, count + 1), side="right")
+    cuts = np.unique(np.clip(cuts - 1, 0, n))
+    cuts[0], cuts[-1] = 0, n
+    return [(int(start), int(stop))
+            for start, stop in zip(cuts, cuts[1:]) if start < stop]
+
+
+def init(layout, n):
+    """
+    Attach a worker process to the shared arrays in `layout`.
+    """
+    for name, (block_name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        shared[name] = (block, np.ndarray(shape, dtype, block.buf))
+    shared["n"] = n
+    shards.clear()
+
+
+def sweep(task):
+    """
+    Compute the next ranks of rows start to stop from the current ones,
+    returning the largest change among them.
+    """
+    start, stop, current, damping_factor, dangling_rank = task
+    n = shared["n"]
+    if (start, stop) not in shards:
+        data, indices, indptr = (
+            shared[name][1] for name in ("data", "indices", "indptr"))
+        first, last = indptr[start], indptr[stop]
+        shards[(start, stop)] = sparse.csr_matrix(
+            (data[first:last], indices[first:last],
+             indptr[start:stop + 1] - first),
+            shape=(stop - start, n), copy=False)
+    rows = shards[(start, stop)]
+
+    ranks = shared["ranks"][1]
+    new_ranks = damping_factor * (
+        rows @ ranks[current] + dangling_rank) + (1 - damping_factor) / n
+    ranks[1 - current, start:stop] = new_ranks
+    return float(np.abs(new_ranks - ranks[current, start:stop]).max())
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python sharded.py corpus [workers]")
+    corpus = crawl(sys.argv[1])
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    ranks = sharded_pagerank(corpus, DAMPING, workers)
+    print("PageRank Results from Sharded Power Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
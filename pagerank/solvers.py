@@ -0,0 +1,203 @@
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve_triangular
+
+from engine import MAX_ITERATIONS, TOLERANCE, transition_matrix
+from pagerank import DAMPING, crawl
+
+NORMS = {
+    "l1": lambda x: np.abs(x).sum(),
+    "l2": lambda x: np.sqrt((x * x).sum()),
+    "max": lambda x: np.abs(x).max()
+}
+
+# Power iterations between Aitken extrapolations
+EXTRAPOLATE_EVERY = 10
+
+# Iterations a page's rank must stay within tolerance before it is frozen
+FREEZE_AFTER = 3
+
+
+def solve(corpus, damping_factor, solver="power", norm="max",
+          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank for `corpus` with one of the SOLVERS.
+
+    Iteration stops once the `norm` ("l1", "l2" or "max") of the change
+    in ranks falls below `tolerance`, or after `max_iterations`.
+
+    Return a dictionary with the page ranks under "ranks", plus the
+    solver's "iterations", "residuals" (the norm of the change after
+    every iteration) and wall-clock "seconds".
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    start = time.perf_counter()
+    ranks, residuals = SOLVERS[solver](
+        matrix, dangling, damping_factor, NORMS[norm], tolerance,
+        max_iterations)
+    seconds = time.perf_counter() - start
+    return {
+        "solver": solver,
+        "ranks": dict(zip(pages, ranks.tolist())),
+        "iterations": len(residuals),
+        "residuals": residuals,
+        "seconds": seconds
+    }
+
+
+def power(matrix, dangling, damping_factor, norm, tolerance, max_iterations):
+    """
+    Plain power (Jacobi) iteration, as in `iterate_pagerank`.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for _ in range(max_iterations):
+        new_ranks = _step(matrix, dangling, damping_factor, ranks)
+        residuals.append(float(norm(new_ranks - ranks)))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def gauss_seidel(matrix, dangling, damping_factor, norm, tolerance,
+                 max_iterations):
+    """
+    Gauss-Seidel iteration on (I - dM) r = d * dangling rank / N + (1 - d) / N.
+
+    Each sweep solves with the lower triangle of I - dM, so every page
+    uses the ranks already updated earlier in the same sweep. The
+    dangling-page term is taken from the previous sweep.
+    """
+    n = matrix.shape[0]
+    system = sparse.identity(n, format="csr") - damping_factor * matrix
+    lower = sparse.tril(system, format="csr")
+    upper = sparse.triu(system, k=1, format="csr")
+
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for _ in range(max_iterations):
+        constant = (damping_factor * ranks[dangling].sum()
+                    + 1 - damping_factor) / n
+        new_ranks = spsolve_triangular(
+            lower, constant - upper @ ranks, lower=True)
+        new_ranks /= new_ranks.sum()
+        residuals.append(float(norm(new_ranks - ranks)))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def extrapolated(matrix, dangling, damping_factor, norm, tolerance,
+                 max_iterations):
+    """
+    Power iteration with an Aitken extrapolation every EXTRAPOLATE_EVERY
+    iterations, which cancels the slowest-decaying error component.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    history = []
+    residuals = []
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = _step(matrix, dangling, damping_factor, ranks)
+        residuals.append(float(norm(new_ranks - ranks)))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+
+        history = (history + [ranks])[-3:]
+        if iteration % EXTRAPOLATE_EVERY == 0 and len(history) == 3:
+            x0, x1, x2 = history
+            first = x1 - x0
+            second = x2 - 2 * x1 + x0
+            safe = np.abs(second) > 1e-15
+            candidate = x2.copy()
+            candidate[safe] = x0[safe] - first[safe] ** 2 / second[safe]
+
+            # Keep the extrapolation only if it is still a distribution
+            if (candidate > 0).all():
+                ranks = candidate / candidate.sum()
+            history = []
+    return ranks, residuals
+
+
+def adaptive(matrix, dangling, damping_factor, norm, tolerance,
+             max_iterations):
+    """
+    Power iteration that stops recomputing pages whose rank has changed
+    by less than `tolerance` for FREEZE_AFTER iterations in a row.
+
+    Once the active pages settle, a full sweep checks convergence, and
+    every page is thawed again if it has not converged.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    teleport = (1 - damping_factor) / n
+    everyone = np.arange(n)
+    active = everyone
+    rows = matrix
+    stable = np.zeros(n, dtype=np.int64)
+    residuals = []
+    for _ in range(max_iterations):
+        dangling_rank = ranks[dangling].sum() / n
+        new_ranks = ranks.copy()
+        new_ranks[active] = damping_factor * (
+            rows @ ranks + dangling_rank) + teleport
+        change = new_ranks - ranks
+        residuals.append(float(norm(change)))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            if len(active) == n:
+                break
+            active, rows = everyone, matrix
+            stable[:] = 0
+            continue
+
+        # Freeze pages that have settled, slicing the matrix only when
+        # the active set shrinks
+        stable[active] = np.where(
+            np.abs(change[active]) < tolerance, stable[active] + 1, 0)
+        still_active = active[stable[active] < FREEZE_AFTER]
+        if len(still_active) < len(active):
+            active = still_active
+            rows = matrix[active]
+    return ranks, residuals
+
+
+SOLVERS = {
+    "power": power,
+    "gauss-seidel": gauss_seidel,
+    "extrapolated": extrapolated,
+    "adaptive": adaptive
+}
+
+
+def _step(matrix, dangling, damping_factor, ranks):
+    n = matrix.shape[0]
+    dangling_rank = ranks[dangling].sum() / n
+    return damping_factor * (matrix @ ranks + dangling_rank) + (
+        1 - damping_factor) / n
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python solvers.py corpus [norm] [tolerance]")
+    corpus = crawl(sys.argv[1])
+    norm = sys.argv[2] if len(sys.argv) > 2 else "max"
+    tolerance = float(sys.argv[3]) if len(sys.argv) > 3 else TOLERANCE
+
+    print(f"Solvers on {sys.argv[1]} ({norm} norm, tolerance {tolerance})")
+    for solver in SOLVERS:
+        report = solve(corpus, DAMPING, solver, norm, tolerance)
+        print(f"  {solver}: {report['iterations']} iterations, "
+              f"residual {report['residuals'][-1]:.2e}, "
+              f"{1000 * report['seconds']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()